@@ -6,6 +6,7 @@ from flask_marshmallow import Marshmallow
 from flask_cors import CORS
 from config import Configuration
 from flask_migrate import Migrate
+from redis import Redis
 
 from flask_apispec.extension import FlaskApiSpec
 
@@ -18,11 +19,12 @@ db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 ma = Marshmallow(app)
 cache = Cache(app)
+redis_client = Redis.from_url(app.config['CACHE_REDIS_URL'])
 docs = FlaskApiSpec(app)
 
-from resources.Dish import DishList, DishDetail, DishImg
+from resources.Dish import DishList, DishDetail, DishImg, DishCookableList, DishSimilarList
 from resources.Ingredient import IngredientList, IngredientDetail
-from resources.Foodstuff import FoodstuffList, FoodstuffDetail
+from resources.Foodstuff import FoodstuffList, FoodstuffDetail, FoodstuffSuggest
 from resources.Dictionary import StoreSectionList, StoreSectionDetail, \
                                  UnitList, UnitDetail, \
                                  StageList, StageDetail,\
@@ -30,15 +32,19 @@ from resources.Dictionary import StoreSectionList, StoreSectionDetail, \
                                  PrePackTypeList, PrePackTypeDetail
 from resources.Menu import MenuList, MenuDetail
 from resources.Menu import MenuDishList, MenuDishDetail
-from resources.Menu import MenuShoppingList, MenuPrePackList
+from resources.Menu import MenuShoppingList, MenuShoppingListPreview, MenuShoppingListRebuild, MenuPrePackList
+from resources.Menu import ShoppingList
 
 api.add_resource(DishList, '/dishes')
+api.add_resource(DishCookableList, '/dishes/cookable')
 api.add_resource(DishDetail, '/dishes/<id>')
 api.add_resource(DishImg, '/dishes/<dish_id>/img')
+api.add_resource(DishSimilarList, '/dishes/<dish_id>/similar')
 api.add_resource(IngredientList, '/dishes/<dish_id>/ingredients')
 api.add_resource(IngredientDetail, '/dishes/<dish_id>/ingredients/<id>')
 
 api.add_resource(FoodstuffList, '/foodstuffs')
+api.add_resource(FoodstuffSuggest, '/foodstuffs/suggest')
 api.add_resource(FoodstuffDetail, '/foodstuffs/<id>')
 
 api.add_resource(StoreSectionList, '/store_sections')
@@ -59,16 +65,22 @@ api.add_resource(MenuDishList, '/menus/<menu_id>/dishes')
 api.add_resource(MenuDishDetail, '/menus/<menu_id>/dishes/<id>')
 
 api.add_resource(MenuShoppingList, '/menus/<menu_id>/shopping_list')
+api.add_resource(MenuShoppingListPreview, '/menus/<menu_id>/shopping_list/preview')
+api.add_resource(MenuShoppingListRebuild, '/menus/<menu_id>/shopping_list/rebuild')
 api.add_resource(MenuPrePackList, '/menus/<menu_id>/pre_pack_list')
+api.add_resource(ShoppingList, '/shopping_list')
 
 docs.register(DishList)
+docs.register(DishCookableList)
 docs.register(DishDetail)
 docs.register(IngredientList)
 docs.register(IngredientDetail)
 docs.register(DishImg)
+docs.register(DishSimilarList)
 
 docs.register(FoodstuffList)
 docs.register(FoodstuffDetail)
+docs.register(FoodstuffSuggest)
 
 docs.register(StoreSectionList)
 docs.register(StoreSectionDetail)
@@ -87,4 +99,7 @@ docs.register(MenuDishList)
 docs.register(MenuDishDetail)
 
 docs.register(MenuShoppingList)
+docs.register(MenuShoppingListPreview)
+docs.register(MenuShoppingListRebuild)
 docs.register(MenuPrePackList)
+docs.register(ShoppingList)
@@ -0,0 +1,193 @@
+import argparse
+import statistics
+
+from flask_migrate import downgrade, upgrade
+from sqlalchemy import text
+
+from app import app, db
+
+from models.db import Menu, MenuDish, Ingredient
+from common.dish_filters import dishes_page_query
+from common.menu_lists import shopping_list_query, materialized_shopping_list_query, pre_pack_list_query, \
+    shopping_list_delta_lock, shopping_list_delta_statement
+
+BASELINE_REVISION = '3e9a4c7d2b61'
+INGREDIENTS_PER_DISH = 20
+DISHES_PER_MENU = 20
+FOODSTUFFS = 5000
+DISH_PAGE = 20
+
+SEED = [
+    "INSERT INTO d_store_section (name) SELECT 'bench' WHERE NOT EXISTS (SELECT 1 FROM d_store_section)",
+    "INSERT INTO d_unit (name, dimension, factor) SELECT 'bench', 'mass', 1 WHERE NOT EXISTS (SELECT 1 FROM d_unit)",
+    "INSERT INTO d_category (name) SELECT 'bench' WHERE NOT EXISTS (SELECT 1 FROM d_category)",
+    """
+    INSERT INTO foodstuff (name, store_section_id)
+    SELECT 'bench foodstuff ' || g, (SELECT min(id) FROM d_store_section)
+    FROM generate_series(1, :foodstuffs) g
+    """,
+    """
+    INSERT INTO dish (name, portion, cook_time, all_time)
+    SELECT 'bench dish ' || g, 4, 15 + g % 120, 30 + g % 240
+    FROM generate_series(1, :dishes) g
+    """,
+    """
+    INSERT INTO dish_categories (dish_id, category_id)
+    SELECT d.id, (SELECT min(id) FROM d_category)
+    FROM dish d WHERE d.name LIKE 'bench dish %'
+    """,
+    """
+    INSERT INTO ingredient (dish_id, foodstuff_id, unit_id, amount)
+    SELECT d.id, f.first + (d.id * 31 + k * 97) % :foodstuffs, (SELECT min(id) FROM d_unit), k + 1
+    FROM dish d
+    CROSS JOIN generate_series(0, :per_dish - 1) k
+    CROSS JOIN (SELECT min(id) AS first FROM foodstuff WHERE name LIKE 'bench foodstuff %') f
+    WHERE d.name LIKE 'bench dish %'
+    """,
+    """
+    INSERT INTO ingredient_alternatives (ingredient_id, foodstuff_id)
+    SELECT i.id, f.first + (i.foodstuff_id - f.first + 1) % :foodstuffs
+    FROM ingredient i
+    JOIN dish d ON d.id = i.dish_id
+    CROSS JOIN (SELECT min(id) AS first FROM foodstuff WHERE name LIKE 'bench foodstuff %') f
+    WHERE d.name LIKE 'bench dish %' AND i.id % 5 = 0
+    """,
+    """
+    INSERT INTO menu (name)
+    SELECT 'bench menu ' || g FROM generate_series(1, :menus) g
+    """,
+    """
+    INSERT INTO menu_dishes (menu_id, dish_id, portion)
+    SELECT m.id, d.id, 4
+    FROM (SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM menu WHERE name LIKE 'bench menu %') m
+    JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM dish WHERE name LIKE 'bench dish %') d
+        ON d.n / :per_menu = m.n
+    """
+]
+
+SAMPLES = """
+SELECT
+    (SELECT max(menu_id) FROM menu_dishes) AS menu_id,
+    (SELECT max(dish_id) FROM ingredient) AS dish_id,
+    (SELECT max(foodstuff_id) FROM ingredient) AS foodstuff_id,
+    (SELECT max(category_id) FROM dish_categories) AS category_id,
+    (SELECT max(id) + 1 FROM d_store_section) AS store_section_id,
+    (SELECT max(id) + 1 FROM d_unit) AS unit_id
+"""
+
+
+def app_queries(sample):
+    return {
+        'menu shopping list': shopping_list_query(sample.menu_id).statement,
+        'stored shopping list': materialized_shopping_list_query([sample.menu_id]).statement,
+        'shopping list delta lock': shopping_list_delta_lock(Ingredient.dish_id == sample.dish_id).statement,
+        'shopping list delta': shopping_list_delta_statement(1, Ingredient.dish_id == sample.dish_id),
+        'menu pre-pack list': pre_pack_list_query(sample.menu_id).statement,
+        'dishes with foodstuff': dishes_page_query({'foodstuff_ids': [sample.foodstuff_id]}, DISH_PAGE)[0].statement,
+        'dishes in category': dishes_page_query({'category_id': sample.category_id}, DISH_PAGE)[0].statement
+    }
+
+
+QUERIES = {
+    'dish ingredients': """
+        SELECT i.*, a.foodstuff_id FROM ingredient i
+        LEFT JOIN ingredient_alternatives a ON a.ingredient_id = i.id
+        WHERE i.dish_id = :dish_id
+    """,
+    'menus of dish': "SELECT DISTINCT menu_id FROM menu_dishes WHERE dish_id = :dish_id",
+    'alternative usage': "SELECT ingredient_id FROM ingredient_alternatives WHERE foodstuff_id = :foodstuff_id",
+    'unit delete guard': "SELECT 1 FROM ingredient WHERE unit_id = :unit_id LIMIT 1",
+    'store section delete guard': "SELECT 1 FROM foodstuff WHERE store_section_id = :store_section_id LIMIT 1",
+}
+
+
+def seed(ingredients):
+    dishes = max(ingredients // INGREDIENTS_PER_DISH, 1)
+    params = {
+        'foodstuffs': FOODSTUFFS,
+        'dishes': dishes,
+        'menus': max(dishes // DISHES_PER_MENU, 1),
+        'per_dish': INGREDIENTS_PER_DISH,
+        'per_menu': DISHES_PER_MENU
+    }
+    for statement in SEED:
+        db.session.execute(text(statement), params)
+    bench_menus = db.session.query(Menu.id).filter(Menu.name.like('bench menu %'))
+    db.session.execute(shopping_list_delta_statement(1, MenuDish.menu_id.in_(bench_menus.subquery())))
+    db.session.commit()
+
+
+def analyze():
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def explain(statement, params=None):
+    compiled = statement.compile(dialect=db.engine.dialect)
+    return db.session.connection().execute('EXPLAIN (ANALYZE, FORMAT JSON) ' + str(compiled),
+                                           compiled.construct_params(params)).scalar()
+
+
+def measure(repeat):
+    sample = db.session.execute(text(SAMPLES)).first()
+    params = dict(sample.items())
+    statements = [(name, statement, None) for name, statement in app_queries(sample).items()]
+    statements += [(name, text(query), params) for name, query in QUERIES.items()]
+
+    results = {}
+    for name, statement, statement_params in statements:
+        timings = []
+        for _ in range(repeat):
+            explained = explain(statement, statement_params)
+            timings.append(explained[0]['Execution Time'])
+        scans = sorted({'{} {}'.format(node['Node Type'], node.get('Relation Name', ''))
+                        for node in plan_nodes(explained[0]['Plan']) if node['Node Type'] == 'Seq Scan'})
+        results[name] = statistics.median(timings), ', '.join(scans) or '-'
+    db.session.rollback()
+    return results
+
+
+def report(before, after):
+    print('{:<28} {:>12} {:>12}  {}'.format('query', 'before, ms', 'after, ms', 'seq scans before -> after'))
+    for name, (after_time, after_scans) in after.items():
+        before_time, before_scans = before.get(name, (None, ''))
+        print('{:<28} {:>12} {:>12.3f}  {} -> {}'.format(
+            name, '-' if before_time is None else '{:.3f}'.format(before_time), after_time, before_scans, after_scans))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure hot queries with EXPLAIN ANALYZE.')
+    parser.add_argument('--seed', type=int, default=0, metavar='INGREDIENTS',
+                        help='insert a synthetic dataset with this many ingredients first')
+    parser.add_argument('--compare', action='store_true',
+                        help='downgrade to {} for the "before" run, then upgrade back'.format(BASELINE_REVISION))
+    parser.add_argument('--allow-downgrade', action='store_true',
+                        help='confirm that --compare may drop the indexes of the configured database')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    if args.compare and not args.allow_downgrade:
+        parser.error('--compare downgrades {!r} to {}, add --allow-downgrade to confirm'.format(
+            db.engine.url, BASELINE_REVISION))
+
+    with app.app_context():
+        if args.seed:
+            seed(args.seed)
+
+        before = {}
+        if args.compare:
+            downgrade(revision=BASELINE_REVISION)
+            analyze()
+            before = measure(args.repeat)
+            upgrade()
+        analyze()
+        report(before, measure(args.repeat))
+
+
+if __name__ == '__main__':
+    main()
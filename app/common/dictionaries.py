@@ -0,0 +1,66 @@
+import threading
+
+from flask import g, has_app_context
+
+from models.db import DCategory, DPrePackType, DStage, DStoreSection, DUnit
+from common.versions import current_version, DICTIONARIES
+
+from app import db
+
+CATEGORY = 'category'
+PRE_PACK_TYPE = 'pre_pack_type'
+STAGE = 'stage'
+STORE_SECTION = 'store_section'
+UNIT = 'unit'
+
+MODELS = {
+    CATEGORY: DCategory,
+    PRE_PACK_TYPE: DPrePackType,
+    STAGE: DStage,
+    STORE_SECTION: DStoreSection,
+    UNIT: DUnit
+}
+
+
+class DictionaryRegistry(object):
+    def __init__(self):
+        self.version = None
+        self.tables = {name: {} for name in MODELS}
+        self.lock = threading.Lock()
+
+    def load(self, version):
+        tables = {}
+        for name, model in MODELS.items():
+            tables[name] = {row.id: row for row in db.session.query(*model.__table__.columns)}
+        self.tables = tables
+        self.version = version
+
+    def checked_version(self):
+        if not has_app_context():
+            return current_version(DICTIONARIES)
+        if 'dictionaries_version' not in g:
+            g.dictionaries_version = current_version(DICTIONARIES)
+        return g.dictionaries_version
+
+    def refresh(self):
+        version = self.checked_version()
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    self.load(version)
+        return self.tables
+
+    def rows(self, name):
+        return self.refresh()[name]
+
+    def get(self, name, id):
+        return self.rows(name).get(id)
+
+    def name(self, name, id):
+        row = self.get(name, id)
+        if row is None:
+            return None
+        return row.name
+
+
+dictionaries = DictionaryRegistry()
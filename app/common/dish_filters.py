@@ -0,0 +1,179 @@
+import base64
+import binascii
+import json
+
+from sqlalchemy import exists, and_, or_, tuple_, cast, func, REAL
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.orm import selectinload
+
+from models.db import Dish, Ingredient, DCategory, t_dish_categories
+from common.search import search_criteria, search_rank
+
+from app import db
+
+TIME_BUCKETS = [15, 30, 60, 120, 240]
+
+
+def cook_time_filter(cook_time):
+    return Dish.cook_time <= cook_time
+
+
+def all_time_filter(all_time):
+    return Dish.all_time <= all_time
+
+
+def category_filter(category_id):
+    return exists().where(and_(t_dish_categories.c.dish_id == Dish.id,
+                               t_dish_categories.c.category_id == category_id)).correlate(Dish)
+
+
+def foodstuffs_filter(foodstuff_ids):
+    return exists().where(and_(Ingredient.dish_id == Dish.id,
+                               Ingredient.foodstuff_id.in_(foodstuff_ids))).correlate(Dish)
+
+
+def search_filter(q):
+    return search_criteria(Dish.search, Dish.name, q)
+
+
+dish_filters = {
+    'q': search_filter,
+    'cook_time': cook_time_filter,
+    'all_time': all_time_filter,
+    'category_id': category_filter,
+    'foodstuff_ids': foodstuffs_filter
+}
+
+
+def dish_criteria(filters):
+    return [dish_filters[name](value) for name, value in filters.items()
+            if name in dish_filters and value is not None]
+
+
+def dish_order(filters):
+    if filters.get('q'):
+        return [search_rank(Dish.search, Dish.name, filters['q']), Dish.id]
+    return [Dish.name, Dish.id]
+
+
+def encode_cursor(values, backward=False):
+    cursor = json.dumps([list(values), backward], ensure_ascii=False)
+    return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+
+def decode_cursor(cursor, ranked=False):
+    try:
+        (key, id), backward = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError('bad cursor')
+
+    key_types = (int, float) if ranked else (str, type(None))
+    if not isinstance(key, key_types) or isinstance(key, bool) \
+            or not isinstance(id, int) or isinstance(id, bool) or not isinstance(backward, bool):
+        raise ValueError('bad cursor')
+    return [key, id], backward
+
+
+def after_cursor(order, values, backward):
+    key, id = order
+    if values[0] is None:
+        if backward:
+            return and_(key.is_(None), id > values[1])
+        return or_(key.isnot(None), id < values[1])
+    if backward:
+        return or_(tuple_(*order) > tuple_(*values), key.is_(None))
+    return tuple_(*order) < tuple_(*values)
+
+
+def dishes_query(filters):
+    return Dish.query\
+        .filter(*dish_criteria(filters))\
+        .options(selectinload(Dish.categories))
+
+
+def dishes_page_query(filters, per_page, cursor=None):
+    order = dish_order(filters)
+    ranked = bool(filters.get('q'))
+    query = dishes_query(filters).add_columns(*order)
+
+    backward = False
+    if cursor:
+        values, backward = decode_cursor(cursor, ranked)
+        if ranked:
+            values[0] = cast(values[0], REAL)
+        query = query.filter(after_cursor(order, values, backward))
+
+    if backward:
+        query = query.order_by(*[column.asc() for column in order])
+    else:
+        query = query.order_by(*[column.desc() for column in order])
+
+    return query.limit(per_page + 1), backward
+
+
+def dishes_page(filters, per_page, cursor=None):
+    query, backward = dishes_page_query(filters, per_page, cursor)
+    rows = query.all()
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backward:
+        rows.reverse()
+
+    next_cursor = None
+    prev_cursor = None
+    if rows:
+        if more or backward:
+            next_cursor = encode_cursor(rows[-1][1:])
+        if (more and backward) or (cursor and not backward):
+            prev_cursor = encode_cursor(rows[0][1:], backward=True)
+
+    return [row[0] for row in rows], next_cursor, prev_cursor
+
+
+def time_buckets(counts):
+    bounds = [None] + TIME_BUCKETS + [None]
+    return [
+        {
+            'from': bounds[bucket],
+            'to': bounds[bucket + 1],
+            'count': counts[bucket]
+        } for bucket in sorted(counts.keys())
+    ]
+
+
+def facet_counts(categories, cook_time, all_time):
+    return {
+        'categories': sorted(categories, key=lambda category: (-category['count'], category['name'])),
+        'cook_time': time_buckets(cook_time),
+        'all_time': time_buckets(all_time)
+    }
+
+
+def dish_facets(filters):
+    cook_time_bucket = func.width_bucket(Dish.cook_time, array(TIME_BUCKETS))
+    all_time_bucket = func.width_bucket(Dish.all_time, array(TIME_BUCKETS))
+    rows = db.session.query(
+        DCategory.id,
+        DCategory.name,
+        cook_time_bucket.label('cook_time_bucket'),
+        all_time_bucket.label('all_time_bucket'),
+        func.grouping(DCategory.id, cook_time_bucket, all_time_bucket).label('grouping'),
+        func.count(Dish.id.distinct()).label('count')
+    ).select_from(Dish)\
+        .outerjoin(t_dish_categories, t_dish_categories.c.dish_id == Dish.id)\
+        .outerjoin(DCategory, DCategory.id == t_dish_categories.c.category_id)\
+        .filter(*dish_criteria(filters))\
+        .group_by(func.grouping_sets(tuple_(DCategory.id, DCategory.name), cook_time_bucket, all_time_bucket))
+
+    categories = []
+    cook_time = {}
+    all_time = {}
+    for row in rows:
+        if row.grouping == 0b011 and row.id is not None:
+            categories.append({'id': row.id, 'name': row.name, 'count': row.count})
+        elif row.grouping == 0b101 and row.cook_time_bucket is not None:
+            cook_time[row.cook_time_bucket] = row.count
+        elif row.grouping == 0b110 and row.all_time_bucket is not None:
+            all_time[row.all_time_bucket] = row.count
+
+    return facet_counts(categories, cook_time, all_time)
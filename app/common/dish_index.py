@@ -0,0 +1,119 @@
+import threading
+
+import numpy
+
+from models.db import Ingredient, t_ingredient_alternatives
+from common.versions import changes_since, DISH_INGREDIENTS
+
+from app import db
+
+
+def positions_array(positions):
+    return numpy.array(positions, dtype=numpy.int64)
+
+
+class DishIndex(object):
+    def __init__(self):
+        self.version = None
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.positions = {}
+        self.dish_ids = positions_array([])
+        self.needs = {}
+        self.need_foodstuffs = []
+        self.need_dish = positions_array([])
+        self.need_live = numpy.zeros(0, dtype=bool)
+        self.need_counts = positions_array([])
+        self.postings = {}
+
+    def count_needs(self):
+        self.need_counts = numpy.bincount(self.need_dish[self.need_live], minlength=len(self.dish_ids))
+
+    def remove(self, dish_id):
+        self.need_live[self.needs.pop(dish_id, [])] = False
+
+    def load(self, dish_ids=None):
+        ingredients = db.session.query(Ingredient.id, Ingredient.dish_id, Ingredient.foodstuff_id)
+        alternatives = db.session.query(t_ingredient_alternatives.c.ingredient_id,
+                                        t_ingredient_alternatives.c.foodstuff_id)\
+            .join(Ingredient, Ingredient.id == t_ingredient_alternatives.c.ingredient_id)
+        if dish_ids is not None:
+            ingredients = ingredients.filter(Ingredient.dish_id.in_(dish_ids))
+            alternatives = alternatives.filter(Ingredient.dish_id.in_(dish_ids))
+
+        substitutes = {}
+        for alternative in alternatives:
+            substitutes.setdefault(alternative.ingredient_id, set()).add(alternative.foodstuff_id)
+
+        needs = {}
+        for ingredient in ingredients:
+            need = frozenset(substitutes.get(ingredient.id, set()) | {ingredient.foodstuff_id})
+            needs.setdefault(ingredient.dish_id, set()).add(need)
+
+        new_dish_ids = []
+        need_dish = []
+        postings = {}
+        for dish_id, dish_needs in needs.items():
+            position = self.positions.get(dish_id)
+            if position is None:
+                position = self.positions[dish_id] = len(self.dish_ids) + len(new_dish_ids)
+                new_dish_ids.append(dish_id)
+
+            self.needs[dish_id] = []
+            for need in dish_needs:
+                index = len(self.need_foodstuffs)
+                self.needs[dish_id].append(index)
+                self.need_foodstuffs.append(need)
+                need_dish.append(position)
+                for foodstuff_id in need:
+                    postings.setdefault(foodstuff_id, []).append(index)
+
+        self.dish_ids = numpy.concatenate([self.dish_ids, positions_array(new_dish_ids)])
+        self.need_dish = numpy.concatenate([self.need_dish, positions_array(need_dish)])
+        self.need_live = numpy.concatenate([self.need_live, numpy.ones(len(need_dish), dtype=bool)])
+        for foodstuff_id, indices in postings.items():
+            self.postings[foodstuff_id] = numpy.concatenate([self.postings.get(foodstuff_id, positions_array([])),
+                                                             positions_array(indices)])
+
+    def refresh(self):
+        version, changed = changes_since(DISH_INGREDIENTS, self.version)
+        if changed is None or (changed and numpy.count_nonzero(self.need_live) * 2 < len(self.need_live)):
+            self.clear()
+            self.load()
+            self.count_needs()
+        elif changed:
+            for dish_id in changed:
+                self.remove(dish_id)
+            self.load(changed)
+            self.count_needs()
+        self.version = version
+
+    def cookable(self, foodstuff_ids, limit):
+        with self.lock:
+            self.refresh()
+
+            postings = [self.postings[foodstuff_id] for foodstuff_id in set(foodstuff_ids)
+                        if foodstuff_id in self.postings]
+            if not postings:
+                return []
+
+            covered = numpy.zeros(len(self.need_live), dtype=bool)
+            covered[numpy.concatenate(postings)] = True
+            covered &= self.need_live
+
+            covered_counts = numpy.bincount(self.need_dish[covered], minlength=len(self.dish_ids))
+            candidates = numpy.flatnonzero(covered_counts)
+            coverage = covered_counts[candidates] / self.need_counts[candidates]
+            missing_counts = self.need_counts[candidates] - covered_counts[candidates]
+            dish_ids = self.dish_ids[candidates]
+            top = numpy.lexsort((dish_ids, missing_counts, -coverage))[:limit]
+
+            return [(int(dish_ids[position]), float(coverage[position]),
+                     [self.need_foodstuffs[index] for index in self.needs[int(dish_ids[position])]
+                      if not covered[index]])
+                    for position in top]
+
+
+dish_index = DishIndex()
@@ -0,0 +1,155 @@
+import heapq
+import random
+import struct
+import threading
+
+from models.db import Ingredient, t_ingredient_alternatives
+from common.versions import changes_since, DISH_INGREDIENTS
+
+from app import db, redis_client
+
+PERMUTATIONS = 64
+BANDS = 32
+ROWS = PERMUTATIONS // BANDS
+PRIME = (1 << 61) - 1
+SIGNATURE_FORMAT = '<{}Q'.format(PERMUTATIONS)
+
+SIGNATURES_KEY = 'minhash:signatures'
+VERSION_KEY = 'minhash:version'
+
+hash_seeds = random.Random(PERMUTATIONS)
+HASHES = [(hash_seeds.randrange(1, PRIME), hash_seeds.randrange(0, PRIME)) for _ in range(PERMUTATIONS)]
+
+store_script = redis_client.register_script("""
+local version = tonumber(redis.call('GET', KEYS[2]) or '-1')
+if version > tonumber(ARGV[1]) then
+    return 0
+end
+if ARGV[2] == '1' then
+    redis.call('DEL', KEYS[1])
+end
+for i = 3, #ARGV, 2 do
+    if ARGV[i + 1] == '' then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+    else
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+    end
+end
+redis.call('SET', KEYS[2], ARGV[1])
+return 1
+""")
+
+
+def signature(foodstuff_ids):
+    return tuple(min((a * foodstuff_id + b) % PRIME for foodstuff_id in foodstuff_ids) for a, b in HASHES)
+
+
+def dish_foodstuffs(dish_ids=None):
+    ingredients = db.session.query(Ingredient.dish_id, Ingredient.foodstuff_id)\
+        .filter(Ingredient.foodstuff_id.isnot(None))
+    alternatives = db.session.query(Ingredient.dish_id, t_ingredient_alternatives.c.foodstuff_id)\
+        .join(t_ingredient_alternatives, t_ingredient_alternatives.c.ingredient_id == Ingredient.id)\
+        .filter(t_ingredient_alternatives.c.foodstuff_id.isnot(None))
+    if dish_ids is not None:
+        ingredients = ingredients.filter(Ingredient.dish_id.in_(dish_ids))
+        alternatives = alternatives.filter(Ingredient.dish_id.in_(dish_ids))
+
+    foodstuffs = {}
+    for row in ingredients.union_all(alternatives):
+        foodstuffs.setdefault(row[0], set()).add(row[1])
+    return foodstuffs
+
+
+class DishSimilarity(object):
+    def __init__(self):
+        self.version = None
+        self.signatures = {}
+        self.buckets = [{} for _ in range(BANDS)]
+        self.lock = threading.Lock()
+
+    def bands(self, dish_signature):
+        return [dish_signature[band * ROWS:(band + 1) * ROWS] for band in range(BANDS)]
+
+    def add(self, dish_id, dish_signature):
+        self.signatures[dish_id] = dish_signature
+        for band, key in enumerate(self.bands(dish_signature)):
+            self.buckets[band].setdefault(key, set()).add(dish_id)
+
+    def remove(self, dish_id):
+        dish_signature = self.signatures.pop(dish_id, None)
+        if dish_signature is None:
+            return
+        for band, key in enumerate(self.bands(dish_signature)):
+            members = self.buckets[band].get(key)
+            if members is not None:
+                members.discard(dish_id)
+                if not members:
+                    del self.buckets[band][key]
+
+    def clear(self):
+        self.signatures = {}
+        self.buckets = [{} for _ in range(BANDS)]
+
+    def load_stored(self):
+        pipeline = redis_client.pipeline()
+        pipeline.get(VERSION_KEY)
+        pipeline.hgetall(SIGNATURES_KEY)
+        version, signatures = pipeline.execute()
+        if version is None:
+            return
+        for dish_id, dish_signature in signatures.items():
+            self.add(int(dish_id), struct.unpack(SIGNATURE_FORMAT, dish_signature))
+        self.version = int(version)
+
+    def update(self, version, dish_ids):
+        full = dish_ids is None
+        if full:
+            self.clear()
+        else:
+            for dish_id in dish_ids:
+                self.remove(dish_id)
+
+        args = [version, '1' if full else '0']
+        foodstuffs = dish_foodstuffs(dish_ids)
+        for dish_id, foodstuff_ids in foodstuffs.items():
+            dish_signature = signature(foodstuff_ids)
+            self.add(dish_id, dish_signature)
+            args.extend([dish_id, struct.pack(SIGNATURE_FORMAT, *dish_signature)])
+        if not full:
+            for dish_id in set(dish_ids) - foodstuffs.keys():
+                args.extend([dish_id, ''])
+
+        store_script(keys=[SIGNATURES_KEY, VERSION_KEY], args=args)
+
+    def refresh(self):
+        if self.version is None:
+            self.load_stored()
+        version, changed = changes_since(DISH_INGREDIENTS, self.version)
+        if changed is None:
+            self.update(version, None)
+        elif changed:
+            self.update(version, changed)
+        self.version = version
+
+    def similar(self, dish_id, limit):
+        with self.lock:
+            self.refresh()
+
+            dish_signature = self.signatures.get(dish_id)
+            if dish_signature is None:
+                return None
+
+            candidates = set()
+            for band, key in enumerate(self.bands(dish_signature)):
+                candidates.update(self.buckets[band].get(key, ()))
+            candidates.discard(dish_id)
+
+            ranked = []
+            for candidate in candidates:
+                equal = sum(1 for a, b in zip(dish_signature, self.signatures[candidate]) if a == b)
+                ranked.append((equal / PERMUTATIONS, -candidate))
+
+            return [(-candidate, similarity) for similarity, candidate in heapq.nlargest(limit, ranked)]
+
+
+dish_similarity = DishSimilarity()
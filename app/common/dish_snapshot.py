@@ -0,0 +1,140 @@
+import collections
+import threading
+
+import numpy
+
+from models.db import Dish, DCategory, t_dish_categories
+from common.dish_filters import decode_cursor, encode_cursor, facet_counts, TIME_BUCKETS
+from common.versions import current_versions, DISHES, CATALOG
+
+from app import db
+
+SnapshotDish = collections.namedtuple('SnapshotDish', ['id', 'name', 'portion', 'cook_time', 'all_time',
+                                                       'categories'])
+SnapshotCategory = collections.namedtuple('SnapshotCategory', ['id', 'name'])
+
+MISSING_TIME = -1
+
+
+def snapshot_supports(filters):
+    return not any(filters.get(name) for name in ('q', 'foodstuff_ids'))
+
+
+class DishSnapshot(object):
+    def __init__(self):
+        self.version = None
+        self.dishes = []
+        self.positions = {}
+        self.cook_time = numpy.empty(0, dtype=numpy.int64)
+        self.all_time = numpy.empty(0, dtype=numpy.int64)
+        self.categories = {}
+        self.category_names = {}
+        self.lock = threading.Lock()
+
+    def load(self, version):
+        categories = {category.id: SnapshotCategory(category.id, category.name)
+                      for category in db.session.query(DCategory.id, DCategory.name)}
+        dish_categories = {}
+        for row in db.session.query(t_dish_categories.c.dish_id, t_dish_categories.c.category_id)\
+                .order_by(t_dish_categories.c.dish_id, t_dish_categories.c.category_id):
+            if row.category_id in categories:
+                dish_categories.setdefault(row.dish_id, []).append(categories[row.category_id])
+
+        dishes = [
+            SnapshotDish(dish.id, dish.name, dish.portion, dish.cook_time, dish.all_time,
+                         dish_categories.get(dish.id, []))
+            for dish in db.session.query(Dish.id, Dish.name, Dish.portion, Dish.cook_time, Dish.all_time)
+            .order_by(Dish.name.desc(), Dish.id.desc())
+        ]
+
+        self.dishes = dishes
+        self.positions = {dish.id: position for position, dish in enumerate(dishes)}
+        self.cook_time = numpy.array([MISSING_TIME if dish.cook_time is None else dish.cook_time
+                                      for dish in dishes], dtype=numpy.int64)
+        self.all_time = numpy.array([MISSING_TIME if dish.all_time is None else dish.all_time
+                                     for dish in dishes], dtype=numpy.int64)
+        self.categories = {category_id: numpy.zeros(len(dishes), dtype=bool) for category_id in categories}
+        for position, dish in enumerate(dishes):
+            for category in dish.categories:
+                self.categories[category.id][position] = True
+        self.category_names = {category_id: category.name for category_id, category in categories.items()}
+        self.version = version
+
+    def refresh(self):
+        version = current_versions(DISHES, CATALOG)
+        if version != self.version:
+            self.load(version)
+
+    def mask(self, filters):
+        mask = numpy.ones(len(self.dishes), dtype=bool)
+        if filters.get('cook_time') is not None:
+            mask &= (self.cook_time != MISSING_TIME) & (self.cook_time <= filters['cook_time'])
+        if filters.get('all_time') is not None:
+            mask &= (self.all_time != MISSING_TIME) & (self.all_time <= filters['all_time'])
+        if filters.get('category_id') is not None:
+            if filters['category_id'] not in self.categories:
+                return numpy.zeros(len(self.dishes), dtype=bool)
+            mask &= self.categories[filters['category_id']]
+        return mask
+
+    def cursor_position(self, cursor):
+        (name, id), backward = decode_cursor(cursor)
+        position = self.positions.get(id)
+        if position is None or self.dishes[position].name != name:
+            return None, backward
+        return position, backward
+
+    def page(self, filters, per_page, cursor=None):
+        with self.lock:
+            self.refresh()
+            mask = self.mask(filters)
+
+            backward = False
+            if cursor:
+                position, backward = self.cursor_position(cursor)
+                if position is None:
+                    return None
+                if backward:
+                    positions = numpy.flatnonzero(mask[:position])[-(per_page + 1):][::-1]
+                else:
+                    positions = numpy.flatnonzero(mask[position + 1:])[:per_page + 1] + position + 1
+            else:
+                positions = numpy.flatnonzero(mask)[:per_page + 1]
+
+            more = len(positions) > per_page
+            dishes = [self.dishes[position] for position in positions[:per_page]]
+            if backward:
+                dishes.reverse()
+
+            next_cursor = None
+            prev_cursor = None
+            if dishes:
+                if more or backward:
+                    next_cursor = encode_cursor([dishes[-1].name, dishes[-1].id])
+                if (more and backward) or (cursor and not backward):
+                    prev_cursor = encode_cursor([dishes[0].name, dishes[0].id], backward=True)
+
+            return dishes, next_cursor, prev_cursor
+
+    def time_buckets(self, times, mask):
+        times = times[mask & (times != MISSING_TIME)]
+        buckets = numpy.searchsorted(TIME_BUCKETS, times, side='right')
+        counts = numpy.bincount(buckets, minlength=len(TIME_BUCKETS) + 1)
+        return {bucket: int(count) for bucket, count in enumerate(counts) if count}
+
+    def facets(self, filters):
+        with self.lock:
+            self.refresh()
+            mask = self.mask(filters)
+
+            categories = []
+            for category_id, members in self.categories.items():
+                count = int(numpy.count_nonzero(mask & members))
+                if count:
+                    categories.append({'id': category_id, 'name': self.category_names[category_id], 'count': count})
+
+            return facet_counts(categories, self.time_buckets(self.cook_time, mask),
+                                self.time_buckets(self.all_time, mask))
+
+
+dish_snapshot = DishSnapshot()
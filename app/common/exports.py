@@ -0,0 +1,43 @@
+from flask import request, Response, stream_with_context
+
+import csv
+import io
+import itertools
+import json
+
+CSV = 'text/csv'
+NDJSON = 'application/x-ndjson'
+
+
+def csv_lines(header, records):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    for record in itertools.chain([header], records):
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def ndjson_lines(header, records):
+    for record in records:
+        yield json.dumps(dict(zip(header, record)), ensure_ascii=False) + '\n'
+
+
+export_formats = {
+    CSV: csv_lines,
+    NDJSON: ndjson_lines
+}
+
+
+def export_mimetype():
+    mimetype = request.accept_mimetypes.best_match(['application/json', CSV, NDJSON])
+    if mimetype in export_formats.keys():
+        return mimetype
+    return None
+
+
+def export_response(mimetype, header, records):
+    lines = export_formats[mimetype](header, records)
+    return Response(stream_with_context(lines), mimetype=mimetype)
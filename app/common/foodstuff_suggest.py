@@ -0,0 +1,46 @@
+import bisect
+import threading
+
+from models.db import Foodstuff
+from common.versions import current_version, FOODSTUFFS
+
+from app import db
+
+
+class FoodstuffPrefixIndex(object):
+    def __init__(self):
+        self.version = None
+        self.keys = []
+        self.foodstuffs = []
+        self.lock = threading.Lock()
+
+    def load(self, version):
+        foodstuffs = sorted((foodstuff.name.casefold(), foodstuff.id, foodstuff.name)
+                            for foodstuff in db.session.query(Foodstuff.id, Foodstuff.name)
+                            .filter(Foodstuff.name.isnot(None)))
+        self.keys = [key for key, id, name in foodstuffs]
+        self.foodstuffs = [(id, name) for key, id, name in foodstuffs]
+        self.version = version
+
+    def refresh(self):
+        version = current_version(FOODSTUFFS)
+        if version != self.version:
+            self.load(version)
+
+    def suggest(self, prefix, limit):
+        with self.lock:
+            self.refresh()
+            keys = self.keys
+            foodstuffs = self.foodstuffs
+
+        prefix = prefix.casefold()
+        result = []
+        position = bisect.bisect_left(keys, prefix)
+        while position < len(keys) and len(result) < limit and keys[position].startswith(prefix):
+            result.append(foodstuffs[position])
+            position += 1
+
+        return result
+
+
+foodstuff_prefix_index = FoodstuffPrefixIndex()
@@ -0,0 +1,173 @@
+import concurrent.futures
+import glob
+import hashlib
+import os
+import tempfile
+import threading
+
+from flask import request, send_file, Response
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app import app
+
+HASH_CHUNK = 64 * 1024
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, no-cache'
+UPLOAD_FORMATS = {'JPEG', 'PNG', 'WEBP'}
+
+digests = {}
+digests_lock = threading.Lock()
+
+upload_executor = concurrent.futures.ThreadPoolExecutor(max_workers=app.config['IMAGE_WORKERS'])
+
+
+def images_dir():
+    return os.path.join(app.root_path, app.config['IMAGES_DIR'])
+
+
+def variants_dir():
+    return os.path.join(images_dir(), app.config['IMAGE_VARIANTS_DIR'])
+
+
+def image_path(dish_id):
+    return os.path.join(images_dir(), '{}.jpg'.format(dish_id))
+
+
+def content_hash(path):
+    stat = os.stat(path)
+    with digests_lock:
+        cached = digests.get(path)
+    if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    digest = digest.hexdigest()[:16]
+
+    with digests_lock:
+        digests[path] = (stat.st_mtime_ns, stat.st_size), digest
+    return digest
+
+
+def image_version(dish_id):
+    path = image_path(dish_id)
+    if not os.path.isfile(path):
+        return None
+    return content_hash(path)
+
+
+def variant_path(dish_id, digest, width):
+    path = os.path.join(variants_dir(), '{}-{}-{}.jpg'.format(dish_id, digest, width))
+    if os.path.isfile(path):
+        return path
+
+    with Image.open(image_path(dish_id)) as image:
+        if image.width <= width:
+            return None
+        image = image.convert('RGB')
+        image.thumbnail((width, image.height * width // image.width + 1), Image.LANCZOS)
+
+        os.makedirs(variants_dir(), exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=variants_dir(), suffix='.jpg')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                image.save(file, 'JPEG', quality=85, optimize=True, progressive=True)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    return path
+
+
+def image_response(path, etag, immutable):
+    accel_prefix = app.config['IMAGES_ACCEL_REDIRECT']
+    if accel_prefix:
+        response = Response(mimetype='image/jpeg')
+        response.headers['X-Accel-Redirect'] = accel_prefix + os.path.relpath(path, images_dir())
+    else:
+        response = send_file(path, mimetype='image/jpeg', add_etags=False, conditional=False)
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = IMMUTABLE if immutable else REVALIDATE
+
+    if accel_prefix or app.use_x_sendfile:
+        return response.make_conditional(request)
+    response.accept_ranges = 'bytes'
+    return response.make_conditional(request, accept_ranges=True, complete_length=os.path.getsize(path))
+
+
+def dish_image(dish_id, width=None, version=None):
+    path = image_path(dish_id)
+    if not os.path.isfile(path):
+        return None
+
+    digest = content_hash(path)
+    if width:
+        path = variant_path(dish_id, digest, width) or path
+
+    return image_response(path, '{}-{}'.format(digest, width or 'full'), version == digest)
+
+
+def save_upload(stream):
+    os.makedirs(images_dir(), exist_ok=True)
+    descriptor, path = tempfile.mkstemp(dir=images_dir(), suffix='.upload')
+    size = 0
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            for chunk in iter(lambda: stream.read(HASH_CHUNK), b''):
+                size += len(chunk)
+                if size > app.config['IMAGE_MAX_BYTES']:
+                    raise ValueError('Image is larger than {} bytes'.format(app.config['IMAGE_MAX_BYTES']))
+                file.write(chunk)
+        if not size:
+            raise ValueError('Image is empty')
+
+        with Image.open(path) as image:
+            if image.format not in UPLOAD_FORMATS:
+                raise ValueError('Image format must be one of {}'.format(', '.join(sorted(UPLOAD_FORMATS))))
+            image.verify()
+    except (UnidentifiedImageError, Image.DecompressionBombError, SyntaxError, OSError):
+        os.unlink(path)
+        raise ValueError('Not a valid image')
+    except BaseException:
+        os.unlink(path)
+        raise
+
+    return path
+
+
+def remove_variants(dish_id, digest):
+    for path in glob.glob(os.path.join(variants_dir(), '{}-*.jpg'.format(dish_id))):
+        if not os.path.basename(path).startswith('{}-{}-'.format(dish_id, digest)):
+            os.unlink(path)
+
+
+def process_upload(dish_id, upload):
+    try:
+        with Image.open(upload) as image:
+            image = ImageOps.exif_transpose(image).convert('RGB')
+            size = app.config['IMAGE_MAX_SIZE']
+            image.thumbnail((size, size), Image.LANCZOS)
+
+            descriptor, temporary = tempfile.mkstemp(dir=images_dir(), suffix='.jpg')
+            try:
+                with os.fdopen(descriptor, 'wb') as file:
+                    image.save(file, 'JPEG', quality=90, optimize=True, progressive=True)
+                os.replace(temporary, image_path(dish_id))
+            except BaseException:
+                os.unlink(temporary)
+                raise
+
+        remove_variants(dish_id, content_hash(image_path(dish_id)))
+    except Exception:
+        app.logger.exception('Processing image for dish %s failed', dish_id)
+    finally:
+        os.unlink(upload)
+
+
+def accept_upload(dish_id, stream):
+    upload = save_upload(stream)
+    return upload_executor.submit(process_upload, dish_id, upload)
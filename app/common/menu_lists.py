@@ -0,0 +1,278 @@
+import math
+import operator
+
+from sqlalchemy import func, literal, select, cast, tuple_, and_
+from sqlalchemy.dialects.postgresql import array, aggregate_order_by, insert, ARRAY
+from sqlalchemy.orm import aliased
+
+from models.db import MenuDish, MenuShoppingItem, Dish, Ingredient, Foodstuff, t_ingredient_alternatives
+from models.db import DStoreSection, DUnit, DPrePackType
+from common.units import unit_conversions, add_need
+from common.versions import id_version, current_version, MENUS, CATALOG
+from common.single_flight import single_flight
+
+from app import db
+
+SHOPPING_LIST_HEADER = ['store_section', 'good', 'amount', 'unit']
+PRE_PACK_LIST_HEADER = ['dish', 'portion', 'pre_pack_type', 'foodstuff', 'amount', 'unit']
+STREAM_BATCH = 500
+
+
+def good_name_column(alternative, *criteria):
+    alternative_names = select([
+        func.string_agg(alternative.name, aggregate_order_by(literal('/'), alternative.id), type_=db.Text)
+    ]).where(and_(*criteria)).as_scalar()
+
+    return Foodstuff.name + func.coalesce(literal('/') + alternative_names, '')
+
+
+def alternative_ids_column():
+    alternative_ids = select([
+        func.array_agg(aggregate_order_by(t_ingredient_alternatives.c.foodstuff_id,
+                                          t_ingredient_alternatives.c.foodstuff_id))
+    ]).where(t_ingredient_alternatives.c.ingredient_id == Ingredient.id).as_scalar()
+
+    return func.coalesce(alternative_ids, cast(literal('{}'), ARRAY(db.Integer)))
+
+
+def menu_amount_column():
+    return Ingredient.amount / Dish.portion * MenuDish.portion
+
+
+def menu_ingredients(*columns):
+    return db.session.query(*columns).select_from(MenuDish)\
+        .join(Dish, Dish.id == MenuDish.dish_id)\
+        .join(Ingredient, Ingredient.dish_id == Dish.id)\
+        .filter(Ingredient.foodstuff_id.isnot(None), Ingredient.unit_id.isnot(None),
+                Ingredient.amount.isnot(None), Dish.portion > 0,
+                MenuDish.menu_id.isnot(None), MenuDish.portion.isnot(None))
+
+
+def shopping_list_query(menu_id):
+    alternative = aliased(Foodstuff)
+    rows = menu_ingredients(
+        DStoreSection.name.label('store_section'),
+        good_name_column(alternative,
+                         t_ingredient_alternatives.c.ingredient_id == Ingredient.id,
+                         t_ingredient_alternatives.c.foodstuff_id == alternative.id).label('good'),
+        DUnit.name.label('unit'),
+        Ingredient.foodstuff_id,
+        Ingredient.unit_id,
+        menu_amount_column().label('amount'),
+        array([MenuDish.id, Ingredient.id]).label('position')
+    ).join(Foodstuff, Foodstuff.id == Ingredient.foodstuff_id)\
+        .join(DStoreSection, DStoreSection.id == Foodstuff.store_section_id)\
+        .join(DUnit, DUnit.id == Ingredient.unit_id)\
+        .filter(MenuDish.menu_id == menu_id)\
+        .subquery()
+
+    group = [rows.c.store_section, rows.c.good, rows.c.unit, rows.c.foodstuff_id, rows.c.unit_id]
+    return db.session.query(
+        *group,
+        func.sum(rows.c.amount).label('amount')
+    ).group_by(*group)\
+        .order_by(func.min(rows.c.position))
+
+
+def materialized_shopping_list_query(menu_ids):
+    group = [MenuShoppingItem.foodstuff_id, MenuShoppingItem.alternative_ids, MenuShoppingItem.unit_id]
+    items = db.session.query(
+        *group,
+        func.sum(MenuShoppingItem.amount).label('amount'),
+        func.min(func.array_prepend(MenuShoppingItem.menu_id, MenuShoppingItem.position)).label('position')
+    ).filter(MenuShoppingItem.menu_id.in_(menu_ids))\
+        .group_by(*group)\
+        .subquery()
+
+    alternative = aliased(Foodstuff)
+    return db.session.query(
+        DStoreSection.name.label('store_section'),
+        good_name_column(alternative, alternative.id == func.any(items.c.alternative_ids)).label('good'),
+        DUnit.name.label('unit'),
+        items.c.foodstuff_id,
+        items.c.unit_id,
+        items.c.amount
+    ).select_from(items)\
+        .join(Foodstuff, Foodstuff.id == items.c.foodstuff_id)\
+        .join(DStoreSection, DStoreSection.id == Foodstuff.store_section_id)\
+        .join(DUnit, DUnit.id == items.c.unit_id)\
+        .order_by(items.c.position)
+
+
+def pre_pack_list_query(menu_id):
+    group = [MenuDish.id, Dish.name, MenuDish.portion, DPrePackType.name, Foodstuff.name,
+             Ingredient.foodstuff_id, DUnit.name, Ingredient.unit_id]
+    return menu_ingredients(
+        MenuDish.id.label('menu_dish_id'),
+        Dish.name.label('dish'),
+        MenuDish.portion.label('portion'),
+        DPrePackType.name.label('pre_pack_type'),
+        Foodstuff.name.label('foodstuff'),
+        Ingredient.foodstuff_id,
+        DUnit.name.label('unit'),
+        Ingredient.unit_id,
+        func.sum(menu_amount_column()).label('amount')
+    ).join(DPrePackType, DPrePackType.id == Ingredient.pre_pack_type_id)\
+        .join(Foodstuff, Foodstuff.id == Ingredient.foodstuff_id)\
+        .join(DUnit, DUnit.id == Ingredient.unit_id)\
+        .filter(MenuDish.menu_id == menu_id)\
+        .group_by(*group)\
+        .order_by(func.min(array([MenuDish.id, Ingredient.id])))
+
+
+def shopping_list_stream(menu_id):
+    rows = materialized_shopping_list_query([menu_id])\
+        .order_by(None)\
+        .order_by('store_section', 'good')\
+        .yield_per(STREAM_BATCH)
+    return merged_records(rows, 'store_section', 'good')
+
+
+def pre_pack_list_stream(menu_id):
+    rows = pre_pack_list_query(menu_id)\
+        .order_by(None)\
+        .order_by(Dish.name, MenuDish.id, DPrePackType.name, Foodstuff.name)\
+        .yield_per(STREAM_BATCH)
+    return merged_records(rows, 'dish', 'portion', 'pre_pack_type', 'foodstuff')
+
+
+def merged_records(rows, *key_columns):
+    conversions = unit_conversions()
+    key = operator.attrgetter(*key_columns)
+    current = None
+    needs = []
+    groups = {}
+    for row in rows:
+        if key(row) != current:
+            for need in needs:
+                yield current + (need['amount'], need['unit'])
+            current = key(row)
+            needs = []
+            groups = {}
+        add_need(needs, groups, conversions, row.foodstuff_id, row.unit_id, row.unit, row.amount)
+
+    for need in needs:
+        yield current + (need['amount'], need['unit'])
+
+
+def shopping_list_delta_lock(*criteria):
+    return menu_ingredients(MenuDish.id)\
+        .filter(*criteria)\
+        .with_for_update(of=[MenuDish, Dish, Ingredient])
+
+
+def shopping_list_delta_statement(sign, *criteria):
+    rows = menu_ingredients(
+        MenuDish.menu_id,
+        Ingredient.foodstuff_id,
+        alternative_ids_column().label('alternative_ids'),
+        Ingredient.unit_id,
+        menu_amount_column().label('amount'),
+        array([MenuDish.id, Ingredient.id]).label('position')
+    ).filter(*criteria).subquery()
+
+    group = [rows.c.menu_id, rows.c.foodstuff_id, rows.c.alternative_ids, rows.c.unit_id]
+    delta = db.session.query(
+        *group,
+        func.sum(rows.c.amount) * sign,
+        func.count() * sign,
+        func.min(rows.c.position)
+    ).group_by(*group)
+
+    table = MenuShoppingItem.__table__
+    key = [table.c.menu_id, table.c.foodstuff_id, table.c.alternative_ids, table.c.unit_id]
+    statement = insert(table).from_select(key + [table.c.amount, table.c.entries, table.c.position],
+                                          delta.statement)
+    changes = {
+        'amount': table.c.amount + statement.excluded.amount,
+        'entries': table.c.entries + statement.excluded.entries
+    }
+    if sign > 0:
+        changes['position'] = func.least(table.c.position, statement.excluded.position)
+    return statement.on_conflict_do_update(index_elements=key, set_=changes)\
+        .returning(*key, table.c.entries)
+
+
+def shopping_list_delta(sign, *criteria):
+    shopping_list_delta_lock(*criteria).all()
+
+    table = MenuShoppingItem.__table__
+    key = [table.c.menu_id, table.c.foodstuff_id, table.c.alternative_ids, table.c.unit_id]
+    emptied = [tuple(row[:-1]) for row in db.session.execute(shopping_list_delta_statement(sign, *criteria))
+               if row.entries <= 0]
+    if emptied:
+        db.session.execute(table.delete().where(tuple_(*key).in_(emptied)))
+
+
+def rebuild_shopping_list(menu_id):
+    db.session.execute(MenuShoppingItem.__table__.delete().where(MenuShoppingItem.menu_id == menu_id))
+    shopping_list_delta(1, MenuDish.menu_id == menu_id)
+
+
+def shopping_list(rows):
+    conversions = unit_conversions()
+    result = {}
+    groups = {}
+    for row in rows:
+        goods = result.setdefault(row.store_section, {})
+        needs = goods.setdefault(row.good, [])
+        add_need(needs, groups.setdefault((row.store_section, row.good), {}), conversions,
+                 row.foodstuff_id, row.unit_id, row.unit, row.amount)
+
+    return result
+
+
+def pre_pack_list(rows):
+    conversions = unit_conversions()
+    result = {}
+    groups = {}
+    portions = {}
+    for row in rows:
+        pre_packs = result.setdefault(row.dish, {})
+        foodstuffs = pre_packs.setdefault(row.pre_pack_type, {})
+        needs = foodstuffs.setdefault(row.foodstuff, [])
+        add_need(needs, groups.setdefault((row.dish, row.pre_pack_type, row.foodstuff), {}), conversions,
+                 row.foodstuff_id, row.unit_id, row.unit, row.amount)
+        portions[row.dish] = row.portion
+
+    for dish, portion in portions.items():
+        result[dish].update({'portion': portion})
+
+    return result
+
+
+def same_shopping_list(expected, actual):
+    if expected.keys() != actual.keys():
+        return False
+
+    for store_section, goods in expected.items():
+        if goods.keys() != actual[store_section].keys():
+            return False
+        for good, needs in goods.items():
+            actual_needs = {need['unit']: need['amount'] for need in actual[store_section][good]}
+            if {need['unit'] for need in needs} != actual_needs.keys():
+                return False
+            for need in needs:
+                if not math.isclose(need['amount'], actual_needs[need['unit']], rel_tol=1e-9):
+                    return False
+
+    return True
+
+
+def menu_ids_of_dish(dish_id):
+    return [menu_dish.menu_id for menu_dish in db.session.query(MenuDish.menu_id)
+            .filter(MenuDish.dish_id == dish_id).distinct()]
+
+
+def menu_list_key(kind, menu_id):
+    return '{}:{}:{}:{}'.format(kind, menu_id, id_version(MENUS, menu_id), current_version(CATALOG))
+
+
+def menu_shopping_list(menu_id):
+    return single_flight(menu_list_key('shopping_list', menu_id),
+                         lambda: shopping_list(materialized_shopping_list_query([menu_id])))
+
+
+def menu_pre_pack_list(menu_id):
+    return single_flight(menu_list_key('pre_pack_list', menu_id),
+                         lambda: pre_pack_list(pre_pack_list_query(menu_id)))
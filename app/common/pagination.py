@@ -0,0 +1,65 @@
+from flask import request
+from sqlalchemy import text
+from urllib.parse import urlencode
+
+from app import db
+
+EXACT_COUNT_LIMIT = 10000
+
+
+def estimated_count(table):
+    estimate = db.session.execute(text('SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)'),
+                                  {'table': table}).scalar()
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+def total_count(query, table=None):
+    if table is not None:
+        estimate = estimated_count(table)
+        if estimate is not None and estimate >= EXACT_COUNT_LIMIT:
+            return estimate
+    return query.order_by(None).count()
+
+
+def page_rows(query, page, limit):
+    rows = query.limit(limit + 1).offset((page - 1) * limit).all()
+    return rows[:limit], len(rows) > limit
+
+
+def page_link(page):
+    args = request.args.to_dict(flat=False)
+    args['page'] = page
+    return request.path + '?' + urlencode(args, doseq=True)
+
+
+def page_links(page, more):
+    return {
+        'self': {
+            'href': request.full_path
+        },
+        'prev': {
+            'href': page_link(page - 1) if page > 1 else None
+        },
+        'next': {
+            'href': page_link(page + 1) if more else None
+        }
+    }
+
+
+def page_headers(total, page, more):
+    links = ', '.join(f'<{link["href"]}>; rel="{rel}"' for rel, link in page_links(page, more).items()
+                      if link['href'] is not None)
+    return {'X-Total-Count': str(total), 'Link': links}
+
+
+def sparse_fields_errors(schema_class, fields):
+    unknown = set(fields or []) - set(schema_class().fields.keys())
+    if unknown:
+        return {
+            'fields': [
+                'Unknown fields: {}'.format(', '.join(sorted(unknown)))
+            ]
+        }
+    return {}
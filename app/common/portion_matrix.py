@@ -0,0 +1,129 @@
+import collections
+import threading
+
+import numpy
+
+from models.db import MenuDish, Dish, Ingredient, Foodstuff, DStoreSection
+from common.menu_lists import alternative_ids_column
+from common.versions import changes_since, DISH_INGREDIENTS
+from common.dictionaries import dictionaries, UNIT
+
+from app import db
+
+ShoppingRow = collections.namedtuple('ShoppingRow', ['store_section', 'good', 'unit', 'foodstuff_id', 'unit_id',
+                                                     'amount'])
+
+
+class PortionMatrix(object):
+    def __init__(self):
+        self.version = None
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.columns = {}
+        self.keys = []
+        self.rows = {}
+
+    def column(self, key):
+        column = self.columns.get(key)
+        if column is None:
+            column = self.columns[key] = len(self.keys)
+            self.keys.append(key)
+        return column
+
+    def refresh(self):
+        version, changed = changes_since(DISH_INGREDIENTS, self.version)
+        if changed is None:
+            self.clear()
+        else:
+            for dish_id in changed:
+                self.rows.pop(dish_id, None)
+        self.version = version
+
+    def load(self, dish_ids):
+        missing = {dish_id for dish_id in dish_ids if dish_id not in self.rows}
+        if not missing:
+            return
+
+        rows = {dish_id: {} for dish_id in missing}
+        ingredients = db.session.query(
+            Ingredient.dish_id,
+            Ingredient.foodstuff_id,
+            alternative_ids_column().label('alternative_ids'),
+            Ingredient.unit_id,
+            (Ingredient.amount / Dish.portion).label('amount')
+        ).join(Dish, Dish.id == Ingredient.dish_id)\
+            .filter(Ingredient.dish_id.in_(missing), Ingredient.amount.isnot(None), Dish.portion > 0)\
+            .order_by(Ingredient.id)
+
+        for ingredient in ingredients:
+            row = rows[ingredient.dish_id]
+            column = self.column((ingredient.foodstuff_id, tuple(ingredient.alternative_ids), ingredient.unit_id))
+            row[column] = row.get(column, 0) + ingredient.amount
+
+        for dish_id, row in rows.items():
+            self.rows[dish_id] = (numpy.fromiter(row.keys(), dtype=numpy.int64, count=len(row)),
+                                  numpy.fromiter(row.values(), dtype=numpy.float64, count=len(row)))
+
+    def dish_rows(self, dish_ids):
+        with self.lock:
+            self.refresh()
+            self.load(dish_ids)
+            return {dish_id: self.rows[dish_id] for dish_id in dish_ids}, self.keys
+
+    def product(self, portions):
+        rows, keys = self.dish_rows({dish_id for dish_id, portion in portions})
+        if not portions:
+            return {}
+
+        columns = numpy.concatenate([rows[dish_id][0] for dish_id, portion in portions])
+        amounts = numpy.concatenate([rows[dish_id][1] * portion for dish_id, portion in portions])
+        totals = numpy.bincount(columns, weights=amounts)
+        used, first = numpy.unique(columns, return_index=True)
+
+        return {keys[column]: float(totals[column]) for column in used[numpy.argsort(first)]}
+
+
+portion_matrix = PortionMatrix()
+
+
+def menu_portions(menu_ids, overrides=None):
+    overrides = overrides or {}
+    menu_dishes = db.session.query(MenuDish.id, MenuDish.dish_id, MenuDish.portion)\
+        .filter(MenuDish.menu_id.in_(menu_ids))\
+        .order_by(MenuDish.menu_id, MenuDish.id)
+
+    portions = []
+    for menu_dish in menu_dishes:
+        portion = overrides.get(menu_dish.id, menu_dish.portion)
+        if portion:
+            portions.append((menu_dish.dish_id, portion))
+
+    return portions
+
+
+def shopping_rows(vector):
+    if not vector:
+        return []
+
+    foodstuff_ids = {foodstuff_id for foodstuff_id, alternative_ids, unit_id in vector}
+    foodstuff_ids.update(alternative_id for key in vector for alternative_id in key[1])
+    foodstuffs = {
+        foodstuff.id: foodstuff
+        for foodstuff in db.session.query(Foodstuff.id, Foodstuff.name, DStoreSection.name.label('store_section'))
+        .outerjoin(DStoreSection, DStoreSection.id == Foodstuff.store_section_id)
+        .filter(Foodstuff.id.in_(foodstuff_ids))
+    }
+    units = dictionaries.rows(UNIT)
+
+    rows = []
+    for (foodstuff_id, alternative_ids, unit_id), amount in vector.items():
+        foodstuff = foodstuffs.get(foodstuff_id)
+        if not foodstuff or not foodstuff.store_section or unit_id not in units:
+            continue
+        good = '/'.join([foodstuff.name] + [foodstuffs[alternative_id].name for alternative_id in alternative_ids
+                                            if alternative_id in foodstuffs])
+        rows.append(ShoppingRow(foodstuff.store_section, good, units[unit_id].name, foodstuff_id, unit_id, amount))
+
+    return rows
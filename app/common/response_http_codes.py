@@ -6,9 +6,18 @@ def response_http_codes(keys):
         201: {
             'description': 'Created'
         },
+        202: {
+            'description': 'Accepted'
+        },
         204: {
             'description': 'Deleted'
         },
+        206: {
+            'description': 'Partial content'
+        },
+        304: {
+            'description': 'Not modified'
+        },
         400: {
             'description': 'Bad request'
         },
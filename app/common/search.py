@@ -0,0 +1,11 @@
+from sqlalchemy import func, or_
+
+SEARCH_CONFIG = 'russian'
+
+
+def search_criteria(search, name, q):
+    return or_(search.op('@@')(func.websearch_to_tsquery(SEARCH_CONFIG, q)), name.op('%%')(q))
+
+
+def search_rank(search, name, q):
+    return func.ts_rank_cd(search, func.websearch_to_tsquery(SEARCH_CONFIG, q)) + func.similarity(name, q)
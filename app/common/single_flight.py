@@ -0,0 +1,84 @@
+import json
+import threading
+
+from redis.exceptions import LockError
+
+from app import app, redis_client
+
+
+class Flight(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+flights = {}
+flights_lock = threading.Lock()
+
+
+def result_key(key):
+    return 'flight:{}'.format(key)
+
+
+def lock_key(key):
+    return 'flight_lock:{}'.format(key)
+
+
+def stored_result(key):
+    result = redis_client.get(result_key(key))
+    if result is None:
+        return None
+    return json.loads(result)
+
+
+def shared_result(key, compute, *args):
+    result = stored_result(key)
+    if result is not None:
+        return result
+
+    lock = redis_client.lock(lock_key(key),
+                             timeout=app.config['SINGLE_FLIGHT_LOCK_TIMEOUT'],
+                             blocking_timeout=app.config['SINGLE_FLIGHT_LOCK_TIMEOUT'])
+    locked = lock.acquire()
+    try:
+        if locked:
+            result = stored_result(key)
+            if result is not None:
+                return result
+
+        result = compute(*args)
+        redis_client.setex(result_key(key), app.config['SINGLE_FLIGHT_TTL'], json.dumps(result, ensure_ascii=False))
+        return result
+    finally:
+        if locked:
+            try:
+                lock.release()
+            except LockError:
+                pass
+
+
+def single_flight(key, compute, *args):
+    with flights_lock:
+        flight = flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = flights[key] = Flight()
+
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = shared_result(key, compute, *args)
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with flights_lock:
+            del flights[key]
+        flight.done.set()
+
+    return flight.result
@@ -0,0 +1,81 @@
+import uuid
+
+from models.db import Foodstuff
+from common.dictionaries import dictionaries, UNIT
+from app import db, cache
+
+VERSION_KEY = 'unit_conversions_version'
+MASS = 'mass'
+VOLUME = 'volume'
+DIMENSIONS = [MASS, VOLUME, 'count']
+
+
+class UnitConversions(object):
+    def __init__(self, version, units, densities):
+        self.version = version
+        self.units = units
+        self.densities = densities
+
+    def group(self, unit_id, foodstuff_id):
+        unit = self.units.get(unit_id)
+        if unit is None or not unit.dimension or not unit.factor:
+            return 'unit', unit_id
+        if unit.dimension in (MASS, VOLUME) and foodstuff_id in self.densities:
+            return MASS, foodstuff_id
+        return unit.dimension
+
+    def convert(self, amount, from_unit_id, to_unit_id, foodstuff_id):
+        if from_unit_id == to_unit_id:
+            return amount
+
+        from_unit = self.units[from_unit_id]
+        to_unit = self.units[to_unit_id]
+        amount = amount * from_unit.factor
+        if from_unit.dimension == VOLUME and to_unit.dimension == MASS:
+            amount = amount * self.densities[foodstuff_id]
+        elif from_unit.dimension == MASS and to_unit.dimension == VOLUME:
+            amount = amount / self.densities[foodstuff_id]
+
+        return amount / to_unit.factor
+
+
+loaded_conversions = UnitConversions(None, {}, {})
+
+
+def unit_conversions():
+    global loaded_conversions
+
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(VERSION_KEY, version):
+            version = cache.get(VERSION_KEY)
+
+    units = dictionaries.rows(UNIT)
+    if version != loaded_conversions.version:
+        densities = {foodstuff.id: foodstuff.density
+                     for foodstuff in db.session.query(Foodstuff.id, Foodstuff.density)
+                     .filter(Foodstuff.density > 0).all()}
+        loaded_conversions = UnitConversions(version, units, densities)
+    elif units is not loaded_conversions.units:
+        loaded_conversions = UnitConversions(version, units, loaded_conversions.densities)
+
+    return loaded_conversions
+
+
+def invalidate_unit_conversions():
+    cache.delete(VERSION_KEY)
+
+
+def add_need(needs, groups, conversions, foodstuff_id, unit_id, unit, amount):
+    group = conversions.group(unit_id, foodstuff_id)
+    if group in groups:
+        need, need_unit_id = groups[group]
+        need['amount'] += conversions.convert(amount, unit_id, need_unit_id, foodstuff_id)
+    else:
+        need = {
+            'amount': amount,
+            'unit': unit
+        }
+        needs.append(need)
+        groups[group] = need, unit_id
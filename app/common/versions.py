@@ -0,0 +1,60 @@
+from app import redis_client
+
+CHANGES_KEPT = 10000
+
+DISH_INGREDIENTS = 'dish_ingredients'
+MENUS = 'menus'
+DISHES = 'dishes'
+FOODSTUFFS = 'foodstuffs'
+CATALOG = 'catalog'
+DICTIONARIES = 'dictionaries'
+
+bump_script = redis_client.register_script("""
+local version = redis.call('INCR', KEYS[1])
+for _, id in ipairs(ARGV) do
+    redis.call('ZADD', KEYS[2], version, id)
+    redis.call('HSET', KEYS[3], id, version)
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', version - %d)
+return version
+""" % CHANGES_KEPT)
+
+
+def version_key(name):
+    return 'version:{}'.format(name)
+
+
+def changes_key(name):
+    return 'changes:{}'.format(name)
+
+
+def id_versions_key(name):
+    return 'versions:{}'.format(name)
+
+
+def bump(name, *ids):
+    return int(bump_script(keys=[version_key(name), changes_key(name), id_versions_key(name)], args=list(ids)))
+
+
+def current_version(name):
+    return int(redis_client.get(version_key(name)) or 0)
+
+
+def current_versions(*names):
+    return tuple(int(version or 0) for version in redis_client.mget([version_key(name) for name in names]))
+
+
+def id_version(name, id):
+    return int(redis_client.hget(id_versions_key(name), id) or 0)
+
+
+def changes_since(name, since):
+    pipeline = redis_client.pipeline()
+    pipeline.get(version_key(name))
+    pipeline.zrangebyscore(changes_key(name), '({}'.format(since or 0), '+inf')
+    version, ids = pipeline.execute()
+
+    version = int(version or 0)
+    if since is None or version < since or version - since > CHANGES_KEPT:
+        return version, None
+    return version, {int(id) for id in ids}
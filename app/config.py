@@ -34,5 +34,17 @@ class Configuration(object):
     CACHE_REDIS_URL = 'redis://{url}/0'.format(
         url=os.environ.get('REDIS_URL', '{host}:{port}'.format(host=settings['Redis']['host'],
                                                                 port=settings['Redis']['port'])))
+    SINGLE_FLIGHT_TTL = 60
+    SINGLE_FLIGHT_LOCK_TIMEOUT = 30
+    DISH_SNAPSHOT = os.environ.get('DISH_SNAPSHOT', '0') == '1'
+
+    IMAGES_DIR = 'images'
+    IMAGE_VARIANTS_DIR = 'variants'
+    IMAGE_WIDTHS = [160, 320, 640, 1280]
+    IMAGES_ACCEL_REDIRECT = os.environ.get('IMAGES_ACCEL_REDIRECT')
+    IMAGE_MAX_BYTES = 20 * 1024 * 1024
+    IMAGE_MAX_SIZE = 2048
+    IMAGE_WORKERS = 2
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', '0') == '1'
 
     JSONIFY_MIMETYPE = 'application/hal+json'
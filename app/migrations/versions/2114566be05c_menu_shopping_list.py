@@ -0,0 +1,57 @@
+"""Materialized menu shopping list.
+
+Revision ID: 2114566be05c
+Revises: d4f96fb37fa1
+Create Date: 2026-10-18 10:40:12.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '2114566be05c'
+down_revision = 'd4f96fb37fa1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('menu_shopping_list',
+    sa.Column('menu_id', sa.Integer(), nullable=False),
+    sa.Column('foodstuff_id', sa.Integer(), nullable=False),
+    sa.Column('alternative_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+    sa.Column('unit_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Float(precision=53), nullable=True),
+    sa.Column('entries', sa.Integer(), nullable=True),
+    sa.Column('position', postgresql.ARRAY(sa.Integer()), nullable=True),
+    sa.ForeignKeyConstraint(['foodstuff_id'], ['foodstuff.id'], ),
+    sa.ForeignKeyConstraint(['menu_id'], ['menu.id'], ),
+    sa.ForeignKeyConstraint(['unit_id'], ['d_unit.id'], ),
+    sa.PrimaryKeyConstraint('menu_id', 'foodstuff_id', 'alternative_ids', 'unit_id')
+    )
+    op.execute("""
+        INSERT INTO menu_shopping_list (menu_id, foodstuff_id, alternative_ids, unit_id, amount, entries, position)
+        SELECT menu_id, foodstuff_id, alternative_ids, unit_id, sum(amount), count(*), min(position)
+        FROM (
+            SELECT md.menu_id,
+                   i.foodstuff_id,
+                   coalesce((SELECT array_agg(ia.foodstuff_id ORDER BY ia.foodstuff_id)
+                             FROM ingredient_alternatives ia
+                             WHERE ia.ingredient_id = i.id), '{}') AS alternative_ids,
+                   i.unit_id,
+                   i.amount / d.portion * md.portion AS amount,
+                   ARRAY[md.id, i.id] AS position
+            FROM menu_dishes md
+            JOIN dish d ON d.id = md.dish_id
+            JOIN ingredient i ON i.dish_id = d.id
+            WHERE i.foodstuff_id IS NOT NULL AND i.unit_id IS NOT NULL AND i.amount IS NOT NULL
+              AND d.portion > 0 AND md.menu_id IS NOT NULL AND md.portion IS NOT NULL
+        ) rows
+        GROUP BY menu_id, foodstuff_id, alternative_ids, unit_id
+    """)
+
+
+def downgrade():
+    op.drop_table('menu_shopping_list')
@@ -0,0 +1,51 @@
+"""Unique ingredients per dish and stage, unique alternatives per ingredient.
+
+Revision ID: 3e9a4c7d2b61
+Revises: 5b7e2f9c1d30
+Create Date: 2026-10-18 14:02:37.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e9a4c7d2b61'
+down_revision = '5b7e2f9c1d30'
+branch_labels = None
+depends_on = None
+
+DUPLICATES_REPORTED = 50
+
+
+def duplicate_ingredients():
+    return op.get_bind().execute(sa.text(
+        'SELECT dish_id, foodstuff_id, coalesce(stage_id, 0) AS stage_id, array_agg(id ORDER BY id) AS ids '
+        'FROM ingredient WHERE dish_id IS NOT NULL AND foodstuff_id IS NOT NULL '
+        'GROUP BY dish_id, foodstuff_id, coalesce(stage_id, 0) HAVING count(*) > 1 '
+        'ORDER BY dish_id, foodstuff_id, coalesce(stage_id, 0)'
+    )).fetchall()
+
+
+def upgrade():
+    duplicates = duplicate_ingredients()
+    if duplicates:
+        report = '\n'.join(f'  dish {row.dish_id}, foodstuff {row.foodstuff_id}, stage {row.stage_id or None}: '
+                           f'ingredients {", ".join(map(str, row.ids))}'
+                           for row in duplicates[:DUPLICATES_REPORTED])
+        if len(duplicates) > DUPLICATES_REPORTED:
+            report += f'\n  ... and {len(duplicates) - DUPLICATES_REPORTED} more'
+        raise RuntimeError(f'Found {len(duplicates)} groups of ingredients with the same dish, foodstuff and stage. '
+                           f'Merge or delete them, then run the migration again:\n{report}')
+
+    op.execute('DELETE FROM ingredient_alternatives a USING ingredient_alternatives b '
+               'WHERE a.ctid > b.ctid AND a.ingredient_id = b.ingredient_id AND a.foodstuff_id = b.foodstuff_id')
+    op.create_index('uq_ingredient_dish_id_foodstuff_id_stage_id', 'ingredient',
+                    ['dish_id', 'foodstuff_id', sa.text('coalesce(stage_id, 0)')], unique=True)
+    op.create_index('uq_ingredient_alternatives_ingredient_id_foodstuff_id', 'ingredient_alternatives',
+                    ['ingredient_id', 'foodstuff_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_ingredient_alternatives_ingredient_id_foodstuff_id', table_name='ingredient_alternatives')
+    op.drop_index('uq_ingredient_dish_id_foodstuff_id_stage_id', table_name='ingredient')
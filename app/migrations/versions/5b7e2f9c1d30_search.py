@@ -0,0 +1,41 @@
+"""Full-text and trigram search over dishes and foodstuffs.
+
+Revision ID: 5b7e2f9c1d30
+Revises: 8c1d5e0b7a42
+Create Date: 2026-10-18 12:41:09.552871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e2f9c1d30'
+down_revision = '8c1d5e0b7a42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.add_column('dish', sa.Column('search', postgresql.TSVECTOR(), sa.Computed(
+        "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('russian', coalesce(description, '')), 'B')", persisted=True), nullable=True))
+    op.add_column('foodstuff', sa.Column('search', postgresql.TSVECTOR(), sa.Computed(
+        "to_tsvector('russian', coalesce(name, ''))", persisted=True), nullable=True))
+    op.create_index('ix_dish_search', 'dish', ['search'], unique=False, postgresql_using='gin')
+    op.create_index('ix_dish_name_trgm', 'dish', ['name'], unique=False, postgresql_using='gin',
+                    postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_foodstuff_search', 'foodstuff', ['search'], unique=False, postgresql_using='gin')
+    op.create_index('ix_foodstuff_name_trgm', 'foodstuff', ['name'], unique=False, postgresql_using='gin',
+                    postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_foodstuff_name_trgm', table_name='foodstuff')
+    op.drop_index('ix_foodstuff_search', table_name='foodstuff')
+    op.drop_index('ix_dish_name_trgm', table_name='dish')
+    op.drop_index('ix_dish_search', table_name='dish')
+    op.drop_column('foodstuff', 'search')
+    op.drop_column('dish', 'search')
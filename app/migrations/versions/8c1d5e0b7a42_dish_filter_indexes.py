@@ -0,0 +1,29 @@
+"""Indexes for dish filters.
+
+Revision ID: 8c1d5e0b7a42
+Revises: f2735f23aa42
+Create Date: 2026-10-18 12:06:21.447310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1d5e0b7a42'
+down_revision = 'f2735f23aa42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_dish_name_id', 'dish', ['name', 'id'], unique=False)
+    op.create_index('ix_ingredient_foodstuff_id_dish_id', 'ingredient', ['foodstuff_id', 'dish_id'], unique=False)
+    op.create_index('ix_dish_categories_category_id_dish_id', 'dish_categories', ['category_id', 'dish_id'],
+                    unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_dish_categories_category_id_dish_id', table_name='dish_categories')
+    op.drop_index('ix_ingredient_foodstuff_id_dish_id', table_name='ingredient')
+    op.drop_index('ix_dish_name_id', table_name='dish')
@@ -0,0 +1,75 @@
+"""Primary keys for association tables and indexes for foreign keys.
+
+Revision ID: 9d3b6a2e8f14
+Revises: 3e9a4c7d2b61
+Create Date: 2026-10-18 14:37:52.604193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3b6a2e8f14'
+down_revision = '3e9a4c7d2b61'
+branch_labels = None
+depends_on = None
+
+
+def invalid_rows(table, *columns):
+    nulls = ' OR '.join(f'{column} IS NULL' for column in columns)
+    keys = ', '.join(columns)
+    return op.get_bind().execute(sa.text(
+        f'SELECT (SELECT count(*) FROM {table} WHERE {nulls}) AS nulls, '
+        f'(SELECT coalesce(sum(copies - 1), 0) FROM (SELECT count(*) AS copies FROM {table} '
+        f'WHERE NOT ({nulls}) GROUP BY {keys} HAVING count(*) > 1) AS groups) AS duplicates'
+    )).first()
+
+
+def upgrade():
+    report = []
+    for table, columns in [('dish_categories', ('dish_id', 'category_id')),
+                           ('ingredient_alternatives', ('ingredient_id', 'foodstuff_id'))]:
+        rows = invalid_rows(table, *columns)
+        if rows.nulls:
+            report.append(f'  {table}: {rows.nulls} rows with NULL {" or ".join(columns)}')
+        if rows.duplicates:
+            report.append(f'  {table}: {rows.duplicates} duplicate rows')
+    if report:
+        report = '\n'.join(report)
+        raise RuntimeError(f'Found rows that do not fit the new primary keys. '
+                           f'Delete them, then run the migration again:\n{report}')
+
+    op.create_primary_key('pk_dish_categories', 'dish_categories', ['dish_id', 'category_id'])
+
+    op.drop_index('uq_ingredient_alternatives_ingredient_id_foodstuff_id', table_name='ingredient_alternatives')
+    op.create_primary_key('pk_ingredient_alternatives', 'ingredient_alternatives', ['ingredient_id', 'foodstuff_id'])
+    op.create_index('ix_ingredient_alternatives_foodstuff_id', 'ingredient_alternatives', ['foodstuff_id'],
+                    unique=False)
+
+    op.create_index('ix_menu_dishes_menu_id_dish_id', 'menu_dishes', ['menu_id', 'dish_id'], unique=False)
+    op.create_index('ix_menu_dishes_dish_id', 'menu_dishes', ['dish_id'], unique=False)
+    op.create_index('ix_foodstuff_store_section_id', 'foodstuff', ['store_section_id'], unique=False)
+    op.create_index('ix_ingredient_unit_id', 'ingredient', ['unit_id'], unique=False)
+    op.create_index('ix_ingredient_stage_id', 'ingredient', ['stage_id'], unique=False)
+    op.create_index('ix_ingredient_pre_pack_type_id', 'ingredient', ['pre_pack_type_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_ingredient_pre_pack_type_id', table_name='ingredient')
+    op.drop_index('ix_ingredient_stage_id', table_name='ingredient')
+    op.drop_index('ix_ingredient_unit_id', table_name='ingredient')
+    op.drop_index('ix_foodstuff_store_section_id', table_name='foodstuff')
+    op.drop_index('ix_menu_dishes_dish_id', table_name='menu_dishes')
+    op.drop_index('ix_menu_dishes_menu_id_dish_id', table_name='menu_dishes')
+
+    op.drop_index('ix_ingredient_alternatives_foodstuff_id', table_name='ingredient_alternatives')
+    op.drop_constraint('pk_ingredient_alternatives', 'ingredient_alternatives', type_='primary')
+    op.alter_column('ingredient_alternatives', 'ingredient_id', existing_type=sa.Integer(), nullable=True)
+    op.alter_column('ingredient_alternatives', 'foodstuff_id', existing_type=sa.Integer(), nullable=True)
+    op.create_index('uq_ingredient_alternatives_ingredient_id_foodstuff_id', 'ingredient_alternatives',
+                    ['ingredient_id', 'foodstuff_id'], unique=True)
+
+    op.drop_constraint('pk_dish_categories', 'dish_categories', type_='primary')
+    op.alter_column('dish_categories', 'dish_id', existing_type=sa.Integer(), nullable=True)
+    op.alter_column('dish_categories', 'category_id', existing_type=sa.Integer(), nullable=True)
@@ -0,0 +1,28 @@
+"""Unit conversion factors and foodstuff density.
+
+Revision ID: f2735f23aa42
+Revises: 2114566be05c
+Create Date: 2026-10-18 11:32:47.905118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2735f23aa42'
+down_revision = '2114566be05c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('d_unit', sa.Column('dimension', sa.Text(), nullable=True))
+    op.add_column('d_unit', sa.Column('factor', sa.Float(precision=53), nullable=True))
+    op.add_column('foodstuff', sa.Column('density', sa.Float(precision=53), nullable=True))
+
+
+def downgrade():
+    op.drop_column('foodstuff', 'density')
+    op.drop_column('d_unit', 'factor')
+    op.drop_column('d_unit', 'dimension')
@@ -1,15 +1,21 @@
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
 from app import db
 
 t_dish_categories = db.Table(
     'dish_categories',
     db.Column('category_id', db.ForeignKey('d_category.id')),
-    db.Column('dish_id', db.ForeignKey('dish.id'))
+    db.Column('dish_id', db.ForeignKey('dish.id')),
+    db.PrimaryKeyConstraint('dish_id', 'category_id', name='pk_dish_categories'),
+    db.Index('ix_dish_categories_category_id_dish_id', 'category_id', 'dish_id')
 )
 
 t_ingredient_alternatives = db.Table(
     'ingredient_alternatives',
     db.Column('ingredient_id', db.ForeignKey('ingredient.id')),
-    db.Column('foodstuff_id', db.ForeignKey('foodstuff.id'))
+    db.Column('foodstuff_id', db.ForeignKey('foodstuff.id')),
+    db.PrimaryKeyConstraint('ingredient_id', 'foodstuff_id', name='pk_ingredient_alternatives'),
+    db.Index('ix_ingredient_alternatives_foodstuff_id', 'foodstuff_id')
 )
 
 
@@ -24,6 +30,10 @@ class Menu(db.Model):
 
 class MenuDish(db.Model):
     __tablename__ = 'menu_dishes'
+    __table_args__ = (
+        db.Index('ix_menu_dishes_menu_id_dish_id', 'menu_id', 'dish_id'),
+        db.Index('ix_menu_dishes_dish_id', 'dish_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     menu_id = db.Column(db.ForeignKey('menu.id'))
@@ -34,8 +44,25 @@ class MenuDish(db.Model):
     dish = db.relationship('Dish', primaryjoin='MenuDish.dish_id == Dish.id')
 
 
+class MenuShoppingItem(db.Model):
+    __tablename__ = 'menu_shopping_list'
+
+    menu_id = db.Column(db.ForeignKey('menu.id'), primary_key=True)
+    foodstuff_id = db.Column(db.ForeignKey('foodstuff.id'), primary_key=True)
+    alternative_ids = db.Column(db.ARRAY(db.Integer), primary_key=True)
+    unit_id = db.Column(db.ForeignKey('d_unit.id'), primary_key=True)
+    amount = db.Column(db.Float(53))
+    entries = db.Column(db.Integer)
+    position = db.Column(db.ARRAY(db.Integer))
+
+
 class Dish(db.Model):
     __tablename__ = 'dish'
+    __table_args__ = (
+        db.Index('ix_dish_name_id', 'name', 'id'),
+        db.Index('ix_dish_search', 'search', postgresql_using='gin'),
+        db.Index('ix_dish_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.Text)
@@ -43,6 +70,10 @@ class Dish(db.Model):
     portion = db.Column(db.Integer)
     cook_time = db.Column(db.Integer)
     all_time = db.Column(db.Integer)
+    search = db.deferred(db.Column(TSVECTOR,
+                                   db.Computed("setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+                                               "setweight(to_tsvector('russian', coalesce(description, '')), 'B')",
+                                               persisted=True)))
 
     categories = db.relationship('DCategory', secondary=t_dish_categories, passive_deletes=True,
                                  backref=db.backref('Dish', lazy='dynamic'))
@@ -50,6 +81,14 @@ class Dish(db.Model):
 
 class Ingredient(db.Model):
     __tablename__ = 'ingredient'
+    __table_args__ = (
+        db.Index('ix_ingredient_foodstuff_id_dish_id', 'foodstuff_id', 'dish_id'),
+        db.Index('uq_ingredient_dish_id_foodstuff_id_stage_id', 'dish_id', 'foodstuff_id',
+                 db.text('coalesce(stage_id, 0)'), unique=True),
+        db.Index('ix_ingredient_unit_id', 'unit_id'),
+        db.Index('ix_ingredient_stage_id', 'stage_id'),
+        db.Index('ix_ingredient_pre_pack_type_id', 'pre_pack_type_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     dish_id = db.Column(db.ForeignKey('dish.id'))
@@ -70,10 +109,17 @@ class Ingredient(db.Model):
 
 class Foodstuff(db.Model):
     __tablename__ = 'foodstuff'
+    __table_args__ = (
+        db.Index('ix_foodstuff_search', 'search', postgresql_using='gin'),
+        db.Index('ix_foodstuff_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_foodstuff_store_section_id', 'store_section_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.Text)
     store_section_id = db.Column(db.ForeignKey('d_store_section.id'))
+    density = db.Column(db.Float(53))
+    search = db.deferred(db.Column(TSVECTOR, db.Computed("to_tsvector('russian', coalesce(name, ''))", persisted=True)))
 
     store_section = db.relationship('DStoreSection', primaryjoin='Foodstuff.store_section_id == DStoreSection.id',
                                     backref='foodstuff')
@@ -114,3 +160,5 @@ class DUnit(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.Text)
+    dimension = db.Column(db.Text)
+    factor = db.Column(db.Float(53))
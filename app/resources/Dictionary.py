@@ -16,6 +16,8 @@ from resources.schema.dictionary.pre_pack_type.request import PrePackTypeRequest
 from resources.schema.dictionary.pre_pack_type.response import PrePackTypeResponseSchema
 from common.response_http_codes import response_http_codes
 
+from common.versions import bump, CATALOG, DICTIONARIES
+
 from app import db
 from app import cache
 
@@ -47,6 +49,8 @@ class StoreSectionList(MethodResource, Resource):
             db.session.add(section)
             db.session.commit()
             cache.clear()
+            bump(CATALOG)
+            bump(DICTIONARIES)
         except exc.SQLAlchemyError as e:
             return {
                        'messages': e.args
@@ -78,6 +82,8 @@ class StoreSectionDetail(MethodResource, Resource):
             db.session.add(section)
             db.session.commit()
             cache.clear()
+            bump(CATALOG)
+            bump(DICTIONARIES)
         except exc.SQLAlchemyError as e:
             return {
                        'messages': e.args
@@ -104,6 +110,8 @@ class StoreSectionDetail(MethodResource, Resource):
             db.session.delete(sections)
             db.session.commit()
             cache.clear()
+            bump(CATALOG)
+            bump(DICTIONARIES)
         except exc.SQLAlchemyError as e:
             return {
                        'messages': e.args
@@ -131,11 +139,16 @@ class UnitList(MethodResource, Resource):
 
         unit = DUnit()
         unit.name = kwargs['name']
+        if 'dimension' in kwargs.keys():
+            unit.dimension = kwargs['dimension']
+            unit.factor = kwargs['factor']
 
         try:
             db.session.add(unit)
             db.session.commit()
             cache.clear()
+            bump(CATALOG)
+            bump(DICTIONARIES)
         except exc.SQLAlchemyError as e:
             db.session.rollback()
             return {
@@ -156,19 +169,30 @@ class UnitDetail(MethodResource, Resource):
     @doc(tags=['dictionary'], description='Update unit.', responses=response_http_codes([200, 400, 404, 503]))
     @use_kwargs(UnitRequestSchema(), location=('json'))
     def put(self, id, **kwargs):
+        unit = DUnit.query.filter(DUnit.id == id).first_or_404()
+
         validation_errors = UnitRequestSchema().validate(kwargs)
+        if unit.name == kwargs['name']:
+            validation_errors.pop('name', None)
         if validation_errors:
             return {
                        'messages': validation_errors
                    }, 400
 
-        unit = DUnit.query.filter(DUnit.id == id).first_or_404()
         unit.name = kwargs['name']
+        if 'dimension' in kwargs.keys():
+            unit.dimension = kwargs['dimension']
+            unit.factor = kwargs['factor']
+        else:
+            unit.dimension = None
+            unit.factor = None
 
         try:
             db.session.add(unit)
             db.session.commit()
             cache.clear()
+            bump(CATALOG)
+            bump(DICTIONARIES)
         except exc.SQLAlchemyError as e:
             return {
                        'messages': e.args
@@ -195,6 +219,8 @@ class UnitDetail(MethodResource, Resource):
             db.session.delete(unit)
             db.session.commit()
             cache.clear()
+            bump(CATALOG)
+            bump(DICTIONARIES)
         except exc.SQLAlchemyError as e:
             return {
                        'messages': e.args
@@ -227,6 +253,8 @@ class StageList(MethodResource, Resource):
             db.session.add(stage)
             db.session.commit()
             cache.clear()
+            bump(CATALOG)
+            bump(DICTIONARIES)
         except exc.SQLAlchemyError as e:
             db.session.rollback()
             return {
@@ -260,6 +288,8 @@ class StageDetail(MethodResource, Resource):
             db.session.add(stage)
             db.session.commit()
             cache.clear()
+            bump(CATALOG)
+            bump(DICTIONARIES)
         except exc.SQLAlchemyError as e:
             return {
                        'messages': e.args
@@ -286,6 +316,8 @@ class StageDetail(MethodResource, Resource):
             db.session.delete(stage)
             db.session.commit()
             cache.clear()
+            bump(CATALOG)
+            bump(DICTIONARIES)
         except exc.SQLAlchemyError as e:
             return {
                        'messages': e.args
@@ -318,6 +350,8 @@ class CategoryList(MethodResource, Resource):
             db.session.add(category)
             db.session.commit()
             cache.clear()
+            bump(CATALOG)
+            bump(DICTIONARIES)
         except exc.SQLAlchemyError as e:
             db.session.rollback()
             return {
@@ -351,6 +385,8 @@ class CategoryDetail(MethodResource, Resource):
             db.session.add(category)
             db.session.commit()
             cache.clear()
+            bump(CATALOG)
+            bump(DICTIONARIES)
         except exc.SQLAlchemyError as e:
             return {
                        'messages': e.args
@@ -377,6 +413,8 @@ class CategoryDetail(MethodResource, Resource):
             db.session.delete(category)
             db.session.commit()
             cache.clear()
+            bump(CATALOG)
+            bump(DICTIONARIES)
         except exc.SQLAlchemyError as e:
             return {
                        'messages': e.args
@@ -409,6 +447,8 @@ class PrePackTypeList(MethodResource, Resource):
             db.session.add(pre_pack_type)
             db.session.commit()
             cache.clear()
+            bump(CATALOG)
+            bump(DICTIONARIES)
         except exc.SQLAlchemyError as e:
             db.session.rollback()
             return {
@@ -442,6 +482,8 @@ class PrePackTypeDetail(MethodResource, Resource):
             db.session.add(pre_pack_type)
             db.session.commit()
             cache.clear()
+            bump(CATALOG)
+            bump(DICTIONARIES)
         except exc.SQLAlchemyError as e:
             return {
                        'messages': e.args
@@ -468,6 +510,8 @@ class PrePackTypeDetail(MethodResource, Resource):
             db.session.delete(pre_pack_type)
             db.session.commit()
             cache.clear()
+            bump(CATALOG)
+            bump(DICTIONARIES)
         except exc.SQLAlchemyError as e:
             return {
                        'messages': e.args
@@ -1,22 +1,42 @@
 from flask_restful import Resource
 from sqlalchemy import exc
-from flask import send_from_directory, request
+from flask import request, url_for
+from flask_restful import abort
+from urllib.parse import urlencode
 
 from models.db import Dish, Ingredient, Foodstuff
 from models.db import DCategory, DStage, DUnit, DPrePackType
 from resources.schema.dish.request import DishRequestSchema
-from resources.schema.dish.filter import DishFilterSchema
+from resources.schema.dish.filter import DishFilterSchema, CookableDishFilterSchema, SimilarDishFilterSchema
+from resources.schema.dish.filter import DishImgFilterSchema
 from resources.schema.dish.response import DishesResponseSchema, DishResponseSchema
 from common.response_http_codes import response_http_codes
+from common.menu_lists import shopping_list_delta, menu_ids_of_dish
+from common.versions import bump, DISH_INGREDIENTS, MENUS, DISHES
+from common.dish_filters import dishes_page, dish_facets
+from common.dish_index import dish_index
+from common.dish_snapshot import dish_snapshot, snapshot_supports
+from common.dish_similarity import dish_similarity
+from common.images import dish_image, accept_upload
 
-from app import db
+from app import app, db
 
 from flask_apispec.views import MethodResource
 from flask_apispec import doc, use_kwargs
 
 
+def cursor_link(cursor):
+    if cursor is None:
+        return None
+    args = request.args.to_dict(flat=False)
+    args['cursor'] = cursor
+    return request.path + '?' + urlencode(args, doseq=True)
+
+
 class DishList(MethodResource, Resource):
-    @doc(tags=['dish'], description='Read all dishes.', responses=response_http_codes([200, 400, 503]))
+    @doc(tags=['dish'], description='Read all dishes. Pass q to search name and description, ranked by relevance. '
+                                     'Pass facets=true to add category and time bucket counts for the filters.',
+         responses=response_http_codes([200, 400, 503]))
     @use_kwargs(DishFilterSchema(), location=('query'))
     def get(self, **kwargs):
         validation_errors = DishFilterSchema().validate(kwargs)
@@ -25,67 +45,44 @@ class DishList(MethodResource, Resource):
                        'messages': validation_errors
                    }, 400
 
-        if kwargs:
-            conditions = []
-            if 'cook_time' in kwargs.keys():
-                conditions.append('cook_time <= {}'.format(kwargs['cook_time']))
-            if 'all_time' in kwargs.keys():
-                conditions.append('all_time <= {}'.format(kwargs['all_time']))
-            if 'category_id' in kwargs.keys():
-                conditions.append('category_id = {}'.format(kwargs['category_id']))
-            if 'foodstuff_ids' in kwargs.keys():
-                conditions.append('foodstuff_id in ({})'.format(','.join(str(f) for f in kwargs['foodstuff_ids'])))
-
-            condition = ' AND '.join(str(c) for c in conditions)
-            if condition:
-                condition = ' WHERE ' + condition
-
-            requested_page = ' LIMIT {} OFFSET {}'.format(kwargs['per_page'], kwargs['per_page'] * kwargs['page'])
-
-            query = """SELECT DISTINCT dish.id 
-                       FROM dish
-                       JOIN dish_categories dc ON dc.dish_id = dish.id
-                       FULL JOIN ingredient i ON i.dish_id = dish.id
-                    """ + condition + requested_page
-
-            try:
-                result = db.engine.execute(query)
-            except exc.SQLAlchemyError as e:
-                db.session.rollback()
-                return {
-                           'messages': e.args
-                       }, 503
-
-            dish_ids = [row[0] for row in result]
-            dishes = Dish.query.filter(Dish.id.in_(dish_ids)).order_by(Dish.name.desc()).all()
-        else:
-            dishes = Dish.query.order_by(Dish.name.desc()).all()
-
-        kwargs['page'] += 1
-        next_page = request.path + '?' + '&'.join('{}={}'.format(key, kwargs[key]) for key in kwargs)
-        if kwargs['page'] <= 2:
-            prev_page = None
-        else:
-            kwargs['page'] -= 2
-            prev_page = request.path + '?' + '&'.join('{}={}'.format(key, kwargs[key]) for key in kwargs)
+        try:
+            page = None
+            facets = None
+            if app.config['DISH_SNAPSHOT'] and snapshot_supports(kwargs):
+                page = dish_snapshot.page(kwargs, kwargs['per_page'], kwargs.get('cursor'))
+                if page is not None and kwargs['facets']:
+                    facets = dish_snapshot.facets(kwargs)
+            if page is None:
+                page = dishes_page(kwargs, kwargs['per_page'], kwargs.get('cursor'))
+                if kwargs['facets']:
+                    facets = dish_facets(kwargs)
+            dishes, next_cursor, prev_cursor = page
+        except exc.SQLAlchemyError as e:
+            db.session.rollback()
+            return {
+                       'messages': e.args
+                   }, 503
 
         result = {
             'data': DishesResponseSchema().dump(dishes),
             'pagination': {
-                'page': kwargs['page']
+                'per_page': kwargs['per_page'],
+                'cursor': kwargs.get('cursor')
             },
             '_links': {
                 'self': {
                     'href': request.full_path
                 },
                 'prev': {
-                    'href': prev_page
+                    'href': cursor_link(prev_cursor)
                 },
                 'next': {
-                    'href': next_page
+                    'href': cursor_link(next_cursor)
                 }
             }
         }
+        if facets is not None:
+            result['facets'] = facets
         return result, 200
 
     @doc(tags=['dish'], description='Create dish.', responses=response_http_codes([201, 400, 503]))
@@ -111,7 +108,7 @@ class DishList(MethodResource, Resource):
         dish.portion = kwargs['portion']
         dish.cook_time = kwargs['cook_time']
         dish.all_time = kwargs['all_time']
-        for category_id in kwargs['categories']:
+        for category_id in dict.fromkeys(kwargs['categories']):
             category = DCategory.query.get(category_id)
             if category:
                 dish.categories.append(category)
@@ -119,6 +116,7 @@ class DishList(MethodResource, Resource):
         try:
             db.session.add(dish)
             db.session.commit()
+            bump(DISHES)
         except exc.SQLAlchemyError as e:
             db.session.rollback()
             return {
@@ -128,6 +126,28 @@ class DishList(MethodResource, Resource):
         return DishResponseSchema().dump(dish), 201
 
 
+class DishCookableList(MethodResource, Resource):
+    @doc(tags=['dish'], description='Read dishes ranked by share of ingredients covered by foodstuffs, '
+                                     'counting alternatives as substitutes.',
+         responses=response_http_codes([200, 400]))
+    @use_kwargs(CookableDishFilterSchema(), location=('query'))
+    def get(self, **kwargs):
+        ranked = dish_index.cookable(kwargs['foodstuff_ids'], kwargs['limit'])
+
+        return [
+                   {
+                       'dish_id': dish_id,
+                       'coverage': coverage,
+                       'missing': [sorted(need) for need in missing],
+                       '_links': {
+                           'self': {
+                               'href': url_for('dishdetail', id=dish_id)
+                           }
+                       }
+                   } for dish_id, coverage, missing in ranked
+               ], 200
+
+
 class DishDetail(MethodResource, Resource):
     @doc(tags=['dish'], description='Read dish.', responses=response_http_codes([200, 404]))
     def get(self, id):
@@ -143,21 +163,33 @@ class DishDetail(MethodResource, Resource):
                        'messages': validation_errors
                    }, 400
 
-        dish = Dish.query.filter(Dish.id == id).first_or_404()
-        dish.name = kwargs['name']
-        dish.description = kwargs['description']
-        dish.portion = kwargs['portion']
-        dish.cook_time = kwargs['cook_time']
-        dish.all_time = kwargs['all_time']
-
-        new_category_list = []
-        for category_id in kwargs['categories']:
-            new_category_list.append(DCategory.query.get(category_id))
-        dish.categories = new_category_list
+        dish = Dish.query.filter(Dish.id == id).with_for_update().first_or_404()
+        portion_changed = dish.portion != kwargs['portion']
 
         try:
+            if portion_changed:
+                shopping_list_delta(-1, Dish.id == dish.id)
+
+            dish.name = kwargs['name']
+            dish.description = kwargs['description']
+            dish.portion = kwargs['portion']
+            dish.cook_time = kwargs['cook_time']
+            dish.all_time = kwargs['all_time']
+
+            new_category_list = []
+            for category_id in dict.fromkeys(kwargs['categories']):
+                new_category_list.append(DCategory.query.get(category_id))
+            dish.categories = new_category_list
+
             db.session.add(dish)
+            if portion_changed:
+                db.session.flush()
+                shopping_list_delta(1, Dish.id == dish.id)
             db.session.commit()
+            if portion_changed:
+                bump(DISH_INGREDIENTS, id)
+            bump(MENUS, *menu_ids_of_dish(id))
+            bump(DISHES)
         except exc.SQLAlchemyError as e:
             db.session.rollback()
             return {
@@ -182,6 +214,7 @@ class DishDetail(MethodResource, Resource):
             db.session.add(dish)
             db.session.delete(dish)
             db.session.commit()
+            bump(DISHES)
         except exc.SQLAlchemyError as e:
             db.session.rollback()
             return {
@@ -191,8 +224,62 @@ class DishDetail(MethodResource, Resource):
         return '', 204
 
 
+class DishSimilarList(MethodResource, Resource):
+    @doc(tags=['dish'], description='Read dishes with the most similar ingredient sets, alternatives included.',
+         responses=response_http_codes([200, 400, 404]))
+    @use_kwargs(SimilarDishFilterSchema(), location=('query'))
+    def get(self, dish_id, **kwargs):
+        similar = dish_similarity.similar(int(dish_id), kwargs['limit'])
+        if similar is None:
+            Dish.query.filter(Dish.id == dish_id).first_or_404()
+            similar = []
+
+        return [
+                   {
+                       'dish_id': similar_id,
+                       'similarity': similarity,
+                       '_links': {
+                           'self': {
+                               'href': url_for('dishdetail', id=similar_id)
+                           }
+                       }
+                   } for similar_id, similarity in similar
+               ], 200
+
+
 class DishImg(MethodResource, Resource):
-    @doc(tags=['dish'], description='Read dish img.', responses=response_http_codes([200, 404]))
-    def get(self, dish_id):
-        response = send_from_directory(directory='images/', filename='{}.jpg'.format(dish_id))
-        return response, 200
+    @doc(tags=['dish'], description='Read dish img. Pass w for a resized variant and v for the content hash '
+                                     'to get an immutable cacheable response.',
+         responses=response_http_codes([200, 206, 304, 400, 404]))
+    @use_kwargs(DishImgFilterSchema(), location=('query'))
+    def get(self, dish_id, **kwargs):
+        response = dish_image(dish_id, kwargs.get('w'), kwargs.get('v'))
+        if response is None:
+            abort(404)
+
+        return response
+
+    @doc(tags=['dish'], description='Upload dish img as a raw JPEG, PNG or WebP request body. '
+                                     'Resizing and re-encoding run in the background.',
+         responses=response_http_codes([202, 400, 404]))
+    def put(self, dish_id):
+        Dish.query.filter(Dish.id == dish_id).first_or_404()
+
+        try:
+            accept_upload(int(dish_id), request.stream)
+        except ValueError as e:
+            return {
+                       'messages': {
+                           'img': [
+                               str(e)
+                           ]
+                       }
+                   }, 400
+
+        return {
+                   '_links': {
+                       'img': {
+                           'href': url_for('dishimg', dish_id=dish_id)
+                       }
+                   }
+               }, 202
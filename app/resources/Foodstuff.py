@@ -1,11 +1,16 @@
-from flask import request
+from flask import url_for
 from flask_restful import Resource
 from sqlalchemy import exc
 from models.db import Foodstuff, DStoreSection, Ingredient
 from resources.schema.foodstuff.request import FoodstuffRequestSchema
-from resources.schema.foodstuff.filter import FoodstuffFilterSchema
+from resources.schema.foodstuff.filter import FoodstuffFilterSchema, FoodstuffSuggestFilterSchema
 from resources.schema.foodstuff.response import FoodstuffsResponseSchema, FoodstuffResponseSchema
 from common.response_http_codes import response_http_codes
+from common.units import invalidate_unit_conversions
+from common.versions import bump, CATALOG, FOODSTUFFS
+from common.foodstuff_suggest import foodstuff_prefix_index
+from common.search import search_criteria, search_rank
+from common.pagination import total_count, page_rows, page_links, page_headers
 from app import db
 
 from flask_apispec.views import MethodResource
@@ -13,7 +18,10 @@ from flask_apispec import doc, use_kwargs
 
 
 class FoodstuffList(MethodResource, Resource):
-    @doc(tags=['foodstuff'], description='Read all Foodstuffs.', responses=response_http_codes([200, 400]))
+    @doc(tags=['foodstuff'], description='Read all Foodstuffs. Pass q to search by name, ranked by relevance. '
+                                          'Pass fields to return only the listed fields. '
+                                          'X-Total-Count is estimated for large unfiltered lists.',
+         responses=response_http_codes([200, 400]))
     @use_kwargs(FoodstuffFilterSchema(), location=('query'))
     def get(self, **kwargs):
 
@@ -23,22 +31,35 @@ class FoodstuffList(MethodResource, Resource):
                        'messages': validation_errors
                    }, 400
 
-        if 'store_section_id' in kwargs.keys():
-            foodstuffs = Foodstuff.query.filter(Foodstuff.store_section_id == kwargs['store_section_id'])\
-                .order_by(Foodstuff.name.desc()).all()
+        foodstuffs = Foodstuff.query
+
+        if 'q' in kwargs.keys():
+            foodstuffs = foodstuffs.filter(search_criteria(Foodstuff.search, Foodstuff.name, kwargs['q']))
+            if 'store_section_id' in kwargs.keys():
+                foodstuffs = foodstuffs.filter(Foodstuff.store_section_id == kwargs['store_section_id'])
+            foodstuffs = foodstuffs\
+                .order_by(search_rank(Foodstuff.search, Foodstuff.name, kwargs['q']).desc(), Foodstuff.id.desc())
+            total = total_count(foodstuffs)
+        elif 'store_section_id' in kwargs.keys():
+            foodstuffs = foodstuffs.filter(Foodstuff.store_section_id == kwargs['store_section_id'])\
+                .order_by(Foodstuff.name.desc(), Foodstuff.id.desc())
+            total = total_count(foodstuffs)
         else:
-            foodstuffs = Foodstuff.query.order_by(Foodstuff.store_section_id.desc()).all()
+            foodstuffs = foodstuffs.order_by(Foodstuff.store_section_id.desc(), Foodstuff.id.desc())
+            total = total_count(foodstuffs, Foodstuff.__tablename__)
+
+        foodstuffs, more = page_rows(foodstuffs, kwargs['page'], kwargs['limit'])
 
-        current_full_path = request.full_path
         result = {
-            'data': FoodstuffsResponseSchema().dump(foodstuffs),
-            '_links': {
-                'self': {
-                    'href': current_full_path
-                }
-            }
+            'data': FoodstuffsResponseSchema(only=kwargs.get('fields')).dump(foodstuffs),
+            'pagination': {
+                'page': kwargs['page'],
+                'limit': kwargs['limit'],
+                'total': total
+            },
+            '_links': page_links(kwargs['page'], more)
         }
-        return result, 200
+        return result, 200, page_headers(total, kwargs['page'], more)
 
     @doc(tags=['foodstuff'], description='Create foodstuff.', responses=response_http_codes([201, 400, 503]))
     @use_kwargs(FoodstuffRequestSchema(), location=('json'))
@@ -62,10 +83,15 @@ class FoodstuffList(MethodResource, Resource):
         foodstuff = Foodstuff()
         foodstuff.name = kwargs['name']
         foodstuff.store_section_id = kwargs['store_section_id']
+        if 'density' in kwargs.keys():
+            foodstuff.density = kwargs['density']
 
         try:
             db.session.add(foodstuff)
             db.session.commit()
+            bump(FOODSTUFFS)
+            if foodstuff.density:
+                invalidate_unit_conversions()
             return FoodstuffResponseSchema().dump(foodstuff), 201
         except exc.SQLAlchemyError as e:
             return {
@@ -73,6 +99,26 @@ class FoodstuffList(MethodResource, Resource):
                    }, 503
 
 
+class FoodstuffSuggest(MethodResource, Resource):
+    @doc(tags=['foodstuff'], description='Suggest foodstuffs whose name starts with prefix.',
+         responses=response_http_codes([200, 400]))
+    @use_kwargs(FoodstuffSuggestFilterSchema(), location=('query'))
+    def get(self, **kwargs):
+        foodstuffs = foodstuff_prefix_index.suggest(kwargs['prefix'], kwargs['limit'])
+
+        return [
+                   {
+                       'id': id,
+                       'name': name,
+                       '_links': {
+                           'self': {
+                               'href': url_for('foodstuffdetail', id=id)
+                           }
+                       }
+                   } for id, name in foodstuffs
+               ], 200
+
+
 class FoodstuffDetail(MethodResource, Resource):
     @doc(tags=['foodstuff'], description='Read foodstuff.', responses=response_http_codes([200, 404]))
     def get(self, id):
@@ -99,12 +145,18 @@ class FoodstuffDetail(MethodResource, Resource):
             return {
                        'messages': validation_errors
                    }, 400
+        density_changed = foodstuff.density != kwargs.get('density')
         foodstuff.name = kwargs['name']
         foodstuff.store_section_id = kwargs['store_section_id']
+        foodstuff.density = kwargs.get('density')
 
         try:
             db.session.add(foodstuff)
             db.session.commit()
+            bump(CATALOG)
+            bump(FOODSTUFFS)
+            if density_changed:
+                invalidate_unit_conversions()
             return FoodstuffResponseSchema().dump(foodstuff), 200
         except exc.SQLAlchemyError as e:
             return {
@@ -125,6 +177,7 @@ class FoodstuffDetail(MethodResource, Resource):
             db.session.add(r)
             db.session.delete(r)
             db.session.commit()
+            bump(FOODSTUFFS)
             return '', 204
         except exc.SQLAlchemyError as e:
             return {
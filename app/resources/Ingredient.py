@@ -1,16 +1,59 @@
 from flask_restful import Resource
+from redis.exceptions import RedisError
 from sqlalchemy import exc
-from models.db import Dish, Ingredient, Foodstuff
+from sqlalchemy.orm import selectinload, joinedload
+from models.db import Dish, Ingredient, t_ingredient_alternatives
 
-from resources.schema.ingredient.request import IngredientRequestSchema
+from resources.schema.ingredient.request import IngredientRequestSchema, IngredientListRequestSchema
 from resources.schema.ingredient.response import IngredientResponseSchema
 from common.response_http_codes import response_http_codes
+from common.menu_lists import shopping_list_delta, menu_ids_of_dish
+from common.versions import bump, DISH_INGREDIENTS, MENUS, DISHES
 
-from app import db
+from app import app, db
 
 from flask_apispec.views import MethodResource
 from flask_apispec import doc, use_kwargs
 
+INGREDIENT_UNIQUE = 'uq_ingredient_dish_id_foodstuff_id_stage_id'
+ALTERNATIVE_UNIQUE = 'pk_ingredient_alternatives'
+
+
+def added_as_alternative(dish_id, foodstuff_id, stage_id, *criteria):
+    return db.session.query(
+        db.session.query(Ingredient.id)
+        .join(t_ingredient_alternatives, t_ingredient_alternatives.c.ingredient_id == Ingredient.id)
+        .filter(Ingredient.dish_id == dish_id, Ingredient.stage_id.isnot_distinct_from(stage_id),
+                t_ingredient_alternatives.c.foodstuff_id == foodstuff_id, *criteria)
+        .exists()
+    ).scalar()
+
+
+def bump_dish_ingredients(dish_id):
+    try:
+        bump(DISH_INGREDIENTS, dish_id)
+        bump(MENUS, *menu_ids_of_dish(dish_id))
+        bump(DISHES)
+    except RedisError:
+        app.logger.exception('Bumping cache versions for dish %s failed', dish_id)
+
+
+def duplicate_errors(error, dish_id):
+    constraint = error.orig.diag.constraint_name
+    if constraint == INGREDIENT_UNIQUE:
+        return {
+            'foodstuff_id': [
+                f'Already added to dish {dish_id}'
+            ]
+        }
+    if constraint == ALTERNATIVE_UNIQUE:
+        return {
+            'alternative_ids': [
+                'Duplicate alternative_id'
+            ]
+        }
+    return None
+
 
 class IngredientList(MethodResource, Resource):
 
@@ -24,31 +67,22 @@ class IngredientList(MethodResource, Resource):
     @use_kwargs(IngredientRequestSchema(), location=('json'))
     def post(self, dish_id, **kwargs):
 
-        validation_errors = IngredientRequestSchema().validate(kwargs)
+        schema = IngredientRequestSchema()
+        validation_errors = schema.validate(kwargs)
 
-        dish = Dish.query.filter(Dish.id == dish_id).first_or_404()
+        Dish.query.filter(Dish.id == dish_id).first_or_404()
         stage_id = None
         if 'stage_id' in kwargs.keys():
             stage_id = kwargs['stage_id']
 
-        for exist_ingredient in dish.ingredients:
-            if exist_ingredient.foodstuff_id == kwargs['foodstuff_id'] and exist_ingredient.stage_id == stage_id:
-                validation_errors.update(
-                    {
-                        'foodstuff_id': [
-                            f'Already added to dish {dish_id}'
-                        ]
-                    }
-                )
-            for alternative_ingredient in exist_ingredient.alternatives:
-                if alternative_ingredient.id == kwargs['foodstuff_id'] and exist_ingredient.stage_id == stage_id:
-                    validation_errors.update(
-                        {
-                            'foodstuff_id': [
-                                f'Already added as alternative to dish {dish_id}'
-                            ]
-                        }
-                    )
+        if added_as_alternative(dish_id, kwargs['foodstuff_id'], stage_id):
+            validation_errors.update(
+                {
+                    'foodstuff_id': [
+                        f'Already added as alternative to dish {dish_id}'
+                    ]
+                }
+            )
 
         if validation_errors:
             return {
@@ -65,21 +99,100 @@ class IngredientList(MethodResource, Resource):
         if 'stage_id' in kwargs.keys():
             ingredient.stage_id = kwargs['stage_id']
 
-        if 'alternative_ids' in kwargs.keys():
-            for alternative_id in kwargs['alternative_ids']:
-                ingredient.alternatives.append(Foodstuff.query.get(alternative_id))
+        ingredient.alternatives = schema.alternatives(kwargs)
 
         try:
             db.session.add(ingredient)
+            db.session.flush()
+            shopping_list_delta(1, Ingredient.id == ingredient.id)
             db.session.commit()
+        except exc.IntegrityError as e:
+            db.session.rollback()
+            validation_errors = duplicate_errors(e, dish_id)
+            if validation_errors:
+                return {
+                           'messages': validation_errors
+                       }, 400
+            return {
+                       'messages': e.args
+                   }, 503
         except exc.SQLAlchemyError as e:
             db.session.rollback()
             return {
                        'messages': e.args
                    }, 503
 
+        bump_dish_ingredients(dish_id)
         return IngredientResponseSchema().dump(ingredient), 201
 
+    @doc(tags=['ingredient'], description='Replace all dish ingredients. Errors are keyed by row index.',
+         responses=response_http_codes([200, 400, 404, 503]))
+    @use_kwargs(IngredientListRequestSchema(), location=('json'))
+    def put(self, dish_id, **kwargs):
+        Dish.query.filter(Dish.id == dish_id).first_or_404()
+
+        schema = IngredientListRequestSchema()
+        validation_errors = schema.validate(kwargs)
+        if validation_errors:
+            return {
+                       'messages': validation_errors
+                   }, 400
+
+        ingredient_table = Ingredient.__table__
+        rows = [
+            {
+                'dish_id': dish_id,
+                'foodstuff_id': row['foodstuff_id'],
+                'amount': row['amount'],
+                'unit_id': row['unit_id'],
+                'pre_pack_type_id': row.get('pre_pack_type_id'),
+                'stage_id': row.get('stage_id')
+            } for row in kwargs['ingredients']
+        ]
+
+        try:
+            shopping_list_delta(-1, Ingredient.dish_id == dish_id)
+            ingredient_ids = db.session.query(Ingredient.id).filter(Ingredient.dish_id == dish_id)
+            db.session.execute(t_ingredient_alternatives.delete()
+                               .where(t_ingredient_alternatives.c.ingredient_id.in_(ingredient_ids.subquery())))
+            db.session.execute(ingredient_table.delete().where(ingredient_table.c.dish_id == dish_id))
+
+            if rows:
+                new_ids = [row.id for row in db.session.execute(ingredient_table.insert().values(rows)
+                                                                .returning(ingredient_table.c.id))]
+                alternatives = [
+                    {
+                        'ingredient_id': ingredient_id,
+                        'foodstuff_id': foodstuff.id
+                    } for ingredient_id, row in zip(new_ids, kwargs['ingredients'])
+                    for foodstuff in schema.alternatives(row)
+                ]
+                if alternatives:
+                    db.session.execute(t_ingredient_alternatives.insert().values(alternatives))
+                shopping_list_delta(1, Ingredient.dish_id == dish_id)
+
+            db.session.commit()
+        except exc.IntegrityError as e:
+            db.session.rollback()
+            validation_errors = duplicate_errors(e, dish_id)
+            if validation_errors:
+                return {
+                           'messages': validation_errors
+                       }, 400
+            return {
+                       'messages': e.args
+                   }, 503
+        except exc.SQLAlchemyError as e:
+            db.session.rollback()
+            return {
+                       'messages': e.args
+                   }, 503
+
+        bump_dish_ingredients(dish_id)
+        ingredients = Ingredient.query.options(selectinload(Ingredient.alternatives), joinedload(Ingredient.foodstuff))\
+            .filter(Ingredient.dish_id == dish_id).order_by(Ingredient.id).all()
+        return IngredientResponseSchema().dump(ingredients, many=True), 200
+
 
 class IngredientDetail(MethodResource, Resource):
     @doc(tags=['ingredient'], description='Read dish ingredient.', responses=response_http_codes([200, 404]))
@@ -93,7 +206,7 @@ class IngredientDetail(MethodResource, Resource):
     @use_kwargs(IngredientRequestSchema(), location=('json'))
     def put(self, dish_id, id, **kwargs):
 
-        dish = Dish.query.filter(Dish.id == dish_id).first_or_404()
+        Dish.query.filter(Dish.id == dish_id).first_or_404()
         ingredient = Ingredient.query.filter(Ingredient.id == id).first_or_404()
 
         if int(ingredient.dish_id) != int(dish_id):
@@ -105,63 +218,60 @@ class IngredientDetail(MethodResource, Resource):
                        }
                    }, 422
 
-        validation_errors = IngredientRequestSchema().validate(kwargs)
-
-        if ingredient.foodstuff_id != kwargs['foodstuff_id']:
-
-            for exist_ingredient in dish.ingredients:
-                if exist_ingredient.foodstuff_id == kwargs['foodstuff_id']:
-                    validation_errors.update(
-                        {
-                            'foodstuff_id': [
-                                f'Already added to dish {dish_id}'
-                            ]
-                        }
-                    )
-                for alternative_ingredient in exist_ingredient.alternatives:
-                    if alternative_ingredient.id == kwargs['foodstuff_id']:
-                        validation_errors.update(
-                            {
-                                'foodstuff_id': [
-                                    f'Already added as alternative to dish {dish_id}'
-                                ]
-                            }
-                        )
+        schema = IngredientRequestSchema()
+        validation_errors = schema.validate(kwargs)
+
+        if added_as_alternative(dish_id, kwargs['foodstuff_id'], kwargs.get('stage_id'),
+                                Ingredient.id != ingredient.id):
+            validation_errors.update(
+                {
+                    'foodstuff_id': [
+                        f'Already added as alternative to dish {dish_id}'
+                    ]
+                }
+            )
 
         if validation_errors:
             return {
                        'messages': validation_errors
                    }, 400
 
-        ingredient.foodstuff_id = kwargs['foodstuff_id']
-        ingredient.amount = kwargs['amount']
-        ingredient.unit_id = kwargs['unit_id']
-        if 'pre_pack_type_id' in kwargs.keys():
-            ingredient.pre_pack_type_id = kwargs['pre_pack_type_id']
-        else:
-            ingredient.pre_pack_type_id = None
-        if 'stage_id' in kwargs.keys():
-            ingredient.stage_id = kwargs['stage_id']
-        else:
-            ingredient.stage_id = None
-
-        if 'alternative_ids' in kwargs.keys():
-            new_ingredient_alternatives = []
-            for alternative_id in kwargs['alternative_ids']:
-                new_ingredient_alternatives.append(Foodstuff.query.get(alternative_id))
-            ingredient.alternatives = new_ingredient_alternatives
-        else:
-            ingredient.alternatives = []
-
         try:
+            shopping_list_delta(-1, Ingredient.id == ingredient.id)
+            ingredient.alternatives = schema.alternatives(kwargs)
+            ingredient.foodstuff_id = kwargs['foodstuff_id']
+            ingredient.amount = kwargs['amount']
+            ingredient.unit_id = kwargs['unit_id']
+            if 'pre_pack_type_id' in kwargs.keys():
+                ingredient.pre_pack_type_id = kwargs['pre_pack_type_id']
+            else:
+                ingredient.pre_pack_type_id = None
+            if 'stage_id' in kwargs.keys():
+                ingredient.stage_id = kwargs['stage_id']
+            else:
+                ingredient.stage_id = None
+
             db.session.add(ingredient)
+            db.session.flush()
+            shopping_list_delta(1, Ingredient.id == ingredient.id)
             db.session.commit()
+        except exc.IntegrityError as e:
+            db.session.rollback()
+            validation_errors = duplicate_errors(e, dish_id)
+            if validation_errors:
+                return {
+                           'messages': validation_errors
+                       }, 400
+            return {
+                       'messages': e.args
+                   }, 503
         except exc.SQLAlchemyError as e:
             db.session.rollback()
             return {
                        'messages': e.args
                    }, 503
 
+        bump_dish_ingredients(dish_id)
         return IngredientResponseSchema().dump(ingredient), 200
 
     @doc(tags=['ingredient'], description='Delete dish ingredient.', responses=response_http_codes([204, 400, 404, 503]))
@@ -177,12 +287,15 @@ class IngredientDetail(MethodResource, Resource):
                    }, 422
 
         try:
+            shopping_list_delta(-1, Ingredient.id == ingredient.id)
             db.session.add(ingredient)
             db.session.delete(ingredient)
             db.session.commit()
-            return '', 204
         except exc.SQLAlchemyError as e:
             db.session.rollback()
             return {
                        'messages': e.args
                    }, 503
+
+        bump_dish_ingredients(dish_id)
+        return '', 204
@@ -4,9 +4,21 @@ from models.db import Menu, MenuDish
 
 from resources.schema.menu.request import MenuRequestSchema
 from resources.schema.menu.response import MenuResponseSchema
+from resources.schema.menu.filter import MenuFilterSchema
 from resources.schema.menudish.request import MenuDishRequestSchema
 from resources.schema.menudish.response import MenuDishResponseSchema
+from resources.schema.shopping_list.filter import ShoppingListFilterSchema
+from resources.schema.shopping_list.request import ShoppingListPreviewRequestSchema
 from common.response_http_codes import response_http_codes
+from common.menu_lists import shopping_list_query, materialized_shopping_list_query, shopping_list
+from common.menu_lists import shopping_list_delta, rebuild_shopping_list, same_shopping_list
+from common.menu_lists import menu_shopping_list, menu_pre_pack_list
+from common.menu_lists import shopping_list_stream, pre_pack_list_stream
+from common.menu_lists import SHOPPING_LIST_HEADER, PRE_PACK_LIST_HEADER
+from common.portion_matrix import portion_matrix, menu_portions, shopping_rows
+from common.exports import export_mimetype, export_response
+from common.versions import bump, MENUS
+from common.pagination import total_count, page_rows, page_headers
 
 from app import db
 
@@ -15,11 +27,24 @@ from flask_apispec import doc, use_kwargs
 
 
 class MenuList(MethodResource, Resource):
-    @doc(tags=['menu'], description='Read all menus.', responses=response_http_codes([200]))
-    def get(self):
-        menus = Menu.query.order_by(Menu.id.desc()).all()
+    @doc(tags=['menu'], description='Read all menus. Pass page and limit to page through them and fields to '
+                                     'return only the listed fields. X-Total-Count is estimated for large tables, '
+                                     'the Link header points to the previous and next pages.',
+         responses=response_http_codes([200, 400]))
+    @use_kwargs(MenuFilterSchema(), location=('query'))
+    def get(self, **kwargs):
+        validation_errors = MenuFilterSchema().validate(kwargs)
+        if validation_errors:
+            return {
+                       'messages': validation_errors
+                   }, 400
+
+        menus = Menu.query.order_by(Menu.id.desc())
+        total = total_count(menus, Menu.__tablename__)
+        menus, more = page_rows(menus, kwargs['page'], kwargs['limit'])
 
-        return MenuResponseSchema().dump(menus, many=True), 200
+        return MenuResponseSchema(only=kwargs.get('fields')).dump(menus, many=True), 200, \
+            page_headers(total, kwargs['page'], more)
 
     @doc(tags=['menu'], description='Create menu.', responses=response_http_codes([201, 400, 503]))
     @use_kwargs(MenuRequestSchema(), location=('json'))
@@ -133,7 +158,10 @@ class MenuDishList(MethodResource, Resource):
 
         try:
             db.session.add(menu_dish)
+            db.session.flush()
+            shopping_list_delta(1, MenuDish.id == menu_dish.id)
             db.session.commit()
+            bump(MENUS, menu_id)
         except exc.SQLAlchemyError as e:
             db.session.rollback()
             return {
@@ -174,12 +202,16 @@ class MenuDishDetail(MethodResource, Resource):
                            }
                        }, 422
 
-        menu_dish.dish_id = kwargs['dish_id']
-        menu_dish.portion = kwargs['portion']
-
         try:
+            shopping_list_delta(-1, MenuDish.id == menu_dish.id)
+            menu_dish.dish_id = kwargs['dish_id']
+            menu_dish.portion = kwargs['portion']
+
             db.session.add(menu_dish)
+            db.session.flush()
+            shopping_list_delta(1, MenuDish.id == menu_dish.id)
             db.session.commit()
+            bump(MENUS, menu_id)
         except exc.SQLAlchemyError as e:
             db.session.rollback()
             return {
@@ -193,10 +225,13 @@ class MenuDishDetail(MethodResource, Resource):
         menu_dish = MenuDish.query.filter(MenuDish.menu_id == menu_id, MenuDish.id == id).first_or_404()
 
         try:
+            shopping_list_delta(-1, MenuDish.id == menu_dish.id)
             db.session.add(menu_dish)
             db.session.delete(menu_dish)
             db.session.commit()
+            bump(MENUS, menu_id)
         except exc.SQLAlchemyError as e:
+            db.session.rollback()
             return {
                        'messages': e.args
                    }, 503
@@ -205,99 +240,91 @@ class MenuDishDetail(MethodResource, Resource):
 
 
 class MenuShoppingList(MethodResource, Resource):
-    @doc(tags=['menu'], description='Read shopping list for menu.', responses=response_http_codes([200, 404]))
+    @doc(tags=['menu'], description='Read shopping list for menu. '
+                                     'Send Accept: text/csv or application/x-ndjson to stream it as rows.',
+         responses=response_http_codes([200, 404]))
     def get(self, menu_id):
-        menu = Menu.query.filter(Menu.id == menu_id).first_or_404()
-        result = {}
-
-        for menu_dish in menu.menu_dishes:
-            for ingredient in menu_dish.dish.ingredients:
-
-                good_name = ingredient.foodstuff.name
-                if ingredient.alternatives:
-                    good_name += '/' + '/'.join([i.name for i in ingredient.alternatives])
-
-                store_section = ingredient.foodstuff.store_section.name
-                tmp_goods = result.get(store_section, {})
-                good = tmp_goods.get(good_name, {})
-
-                if good:
-                    was_update = False
-                    for need in good:
-                        if need['unit'] == ingredient.unit.name:
-                            need['amount'] += ingredient.amount / ingredient.dish.portion * menu_dish.portion
-                            was_update = True
-
-                    if not was_update:
-                        good.append(
-                            {
-                                'amount': ingredient.amount / ingredient.dish.portion * menu_dish.portion,
-                                'unit': ingredient.unit.name
-                            }
-                        )
-                else:
-                    good = {
-                        good_name: [
-                            {
-                                'amount': ingredient.amount / ingredient.dish.portion * menu_dish.portion,
-                                'unit': ingredient.unit.name
-                            }
-                        ]
-                    }
-                    tmp_goods.update(good)
-
-                result.update({store_section: tmp_goods})
-
-        return result, 200
+        Menu.query.filter(Menu.id == menu_id).first_or_404()
+
+        mimetype = export_mimetype()
+        if mimetype:
+            return export_response(mimetype, SHOPPING_LIST_HEADER, shopping_list_stream(menu_id))
+
+        return menu_shopping_list(menu_id), 200
+
+
+class MenuShoppingListPreview(MethodResource, Resource):
+    @doc(tags=['menu'], description='Preview shopping list for menu with other portions. Nothing is saved.',
+         responses=response_http_codes([200, 400, 404]))
+    @use_kwargs(ShoppingListPreviewRequestSchema(), location=('json'))
+    def post(self, menu_id, **kwargs):
+        Menu.query.filter(Menu.id == menu_id).first_or_404()
+
+        menu_dish_ids = {menu_dish.id for menu_dish in db.session.query(MenuDish.id)
+                         .filter(MenuDish.menu_id == menu_id, MenuDish.id.in_(kwargs['portions'].keys()))}
+        if menu_dish_ids != set(kwargs['portions'].keys()):
+            return {
+                       'messages': {
+                           'portions': [
+                               f'Bad choice for menu dish of menu {menu_id}'
+                           ]
+                       }
+                   }, 400
+
+        vector = portion_matrix.product(menu_portions([menu_id], kwargs['portions']))
+
+        return shopping_list(shopping_rows(vector)), 200
+
+
+class MenuShoppingListRebuild(MethodResource, Resource):
+    @doc(tags=['menu'], description='Rebuild stored shopping list for menu and check it against a full recompute.',
+         responses=response_http_codes([200, 404, 503]))
+    def post(self, menu_id):
+        Menu.query.filter(Menu.id == menu_id).first_or_404()
+
+        stored = shopping_list(materialized_shopping_list_query([menu_id]))
+        expected = shopping_list(shopping_list_query(menu_id))
+
+        try:
+            rebuild_shopping_list(menu_id)
+            db.session.commit()
+            bump(MENUS, menu_id)
+        except exc.SQLAlchemyError as e:
+            db.session.rollback()
+            return {
+                       'messages': e.args
+                   }, 503
+
+        return {
+                   'consistent': same_shopping_list(expected, stored)
+               }, 200
+
+
+class ShoppingList(MethodResource, Resource):
+    @doc(tags=['menu'], description='Read merged shopping list for several menus.',
+         responses=response_http_codes([200, 400]))
+    @use_kwargs(ShoppingListFilterSchema(), location=('query'))
+    def get(self, **kwargs):
+        validation_errors = ShoppingListFilterSchema().validate(kwargs)
+        if validation_errors:
+            return {
+                       'messages': validation_errors
+                   }, 400
+
+        vector = portion_matrix.product(menu_portions(kwargs['menu_ids']))
+
+        return shopping_list(shopping_rows(vector)), 200
 
 
 class MenuPrePackList(MethodResource, Resource):
-    @doc(tags=['menu'], description='Read pre_pack list for menu.', responses=response_http_codes([200, 404]))
+    @doc(tags=['menu'], description='Read pre_pack list for menu. '
+                                     'Send Accept: text/csv or application/x-ndjson to stream it as rows.',
+         responses=response_http_codes([200, 404]))
     def get(self, menu_id):
-        menu = Menu.query.filter(Menu.id == menu_id).first_or_404()
-        result = {}
-
-        for menu_dish in menu.menu_dishes:
-            dish_name = menu_dish.dish.name
-            dish_pre_packs = result.get(dish_name, {})
-
-            for ingredient in menu_dish.dish.ingredients:
-                if ingredient.pre_pack_type:
-                    foodstuff_name = ingredient.foodstuff.name
-                    pre_pack_type = ingredient.pre_pack_type.name
-
-                    tmp_foodstuffs = dish_pre_packs.get(pre_pack_type, {})
-                    foodstuff = tmp_foodstuffs.get(foodstuff_name, {})
-
-                    if foodstuff:
-                        was_update = False
-                        for need in foodstuff:
-                            if need['unit'] == ingredient.unit.name:
-                                need['amount'] += ingredient.amount / ingredient.dish.portion * menu_dish.portion
-                                was_update = True
-
-                        if not was_update:
-                            foodstuff.append(
-                                {
-                                    'amount': ingredient.amount / ingredient.dish.portion * menu_dish.portion,
-                                    'unit': ingredient.unit.name
-                                }
-                            )
-                    else:
-                        foodstuff = {
-                            foodstuff_name: [
-                                {
-                                    'amount': ingredient.amount / ingredient.dish.portion * menu_dish.portion,
-                                    'unit': ingredient.unit.name
-                                }
-                            ]
-                        }
-                        tmp_foodstuffs.update(foodstuff)
-
-                    dish_pre_packs.update({pre_pack_type: tmp_foodstuffs})
-
-            if dish_pre_packs:
-                dish_pre_packs.update({'portion': menu_dish.portion})
-                result.update({dish_name: dish_pre_packs})
-
-        return result, 200
+        Menu.query.filter(Menu.id == menu_id).first_or_404()
+
+        mimetype = export_mimetype()
+        if mimetype:
+            return export_response(mimetype, PRE_PACK_LIST_HEADER, pre_pack_list_stream(menu_id))
+
+        return menu_pre_pack_list(menu_id), 200
@@ -1,11 +1,15 @@
 from flask_restful import abort
 from models.db import DUnit
+from common.units import DIMENSIONS
 from marshmallow import Schema, fields, ValidationError, validate, types
 import typing
 
 
 class UnitRequestSchema(Schema):
     name = fields.String(required=True, validate=validate.Length(max=50))
+    dimension = fields.String(required=False, validate=validate.OneOf(DIMENSIONS))
+    factor = fields.Float(required=False, validate=validate.Range(min=0, min_inclusive=False),
+                          description='Amount of the dimension base unit in one unit')
 
     def handle_error(self, error: ValidationError, __, *, many: bool, **kwargs):
         abort(400, messages=error.messages)
@@ -26,4 +30,12 @@ class UnitRequestSchema(Schema):
                     ]
                 }
             )
+        if ('dimension' in data.keys()) != ('factor' in data.keys()):
+            validation_errors.update(
+                {
+                    'factor': [
+                        'dimension and factor must be set together'
+                    ]
+                }
+            )
         return validation_errors
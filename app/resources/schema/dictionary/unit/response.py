@@ -9,3 +9,5 @@ class UnitResponseSchema(ma.SQLAlchemySchema):
 
     id = ma.auto_field()
     name = ma.auto_field()
+    dimension = ma.auto_field()
+    factor = ma.auto_field()
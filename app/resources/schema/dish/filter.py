@@ -1,20 +1,22 @@
 from flask_restful import abort
 
-from models.db import DCategory
-from app import db, cache
+from common.dish_filters import decode_cursor
+from common.dictionaries import dictionaries, CATEGORY
+from app import app
 
 from marshmallow import Schema, fields, ValidationError, validate, types
 import typing
-import json
 
 
 class DishFilterSchema(Schema):
-    page = fields.Integer(required=True, validate=validate.Range(min=1))
+    q = fields.String(required=False, validate=validate.Length(min=1, max=200))
+    cursor = fields.String(required=False)
     per_page = fields.Integer(required=True, validate=validate.Range(min=1))
     cook_time = fields.Integer(required=False)
     all_time = fields.Integer(required=False)
     category_id = fields.Integer(required=False)
     foodstuff_ids = fields.List(cls_or_instance=fields.Integer(), required=False)
+    facets = fields.Boolean(required=False, missing=False)
 
     def handle_error(self, error: ValidationError, __, *, many: bool, **kwargs):
         abort(400, messages=error.messages)
@@ -27,12 +29,7 @@ class DishFilterSchema(Schema):
         partial: typing.Optional[typing.Union[bool, types.StrSequenceOrSet]] = None
     ) -> typing.Dict[str, typing.List[str]]:
 
-        cached_category = cache.get('view//category')
-        if cached_category:
-            raw = json.loads(cached_category.response[0])
-            category_ids = [unit['id'] for unit in raw]
-        else:
-            category_ids = [category.id for category in db.session.query(DCategory.id).all()]
+        category_ids = dictionaries.rows(CATEGORY)
 
         validation_errors = {}
         if 'category_id' in data.keys():
@@ -45,4 +42,39 @@ class DishFilterSchema(Schema):
                     }
                 )
 
+        if data.get('cursor'):
+            try:
+                decode_cursor(data['cursor'], bool(data.get('q')))
+            except ValueError:
+                validation_errors.update(
+                    {
+                        'cursor': [
+                            'bad cursor'
+                        ]
+                    }
+                )
+
         return validation_errors
+
+
+class CookableDishFilterSchema(Schema):
+    foodstuff_ids = fields.List(cls_or_instance=fields.Integer(), required=True)
+    limit = fields.Integer(required=False, missing=10, validate=validate.Range(min=1, max=100))
+
+    def handle_error(self, error: ValidationError, __, *, many: bool, **kwargs):
+        abort(400, messages=error.messages)
+
+
+class SimilarDishFilterSchema(Schema):
+    limit = fields.Integer(required=False, missing=10, validate=validate.Range(min=1, max=100))
+
+    def handle_error(self, error: ValidationError, __, *, many: bool, **kwargs):
+        abort(400, messages=error.messages)
+
+
+class DishImgFilterSchema(Schema):
+    w = fields.Integer(required=False, validate=validate.OneOf(app.config['IMAGE_WIDTHS']))
+    v = fields.String(required=False)
+
+    def handle_error(self, error: ValidationError, __, *, many: bool, **kwargs):
+        abort(400, messages=error.messages)
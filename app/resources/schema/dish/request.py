@@ -1,11 +1,10 @@
 from flask_restful import abort
 
 from models.db import DCategory, DStage, DUnit, DPrePackType
-from app import db, cache
+from common.dictionaries import dictionaries, CATEGORY
 
 from marshmallow import Schema, fields, ValidationError, validate, types
 import typing
-import json
 
 
 class DishRequestSchema(Schema):
@@ -27,12 +26,7 @@ class DishRequestSchema(Schema):
         partial: typing.Optional[typing.Union[bool, types.StrSequenceOrSet]] = None
     ) -> typing.Dict[str, typing.List[str]]:
 
-        cached_category = cache.get('view//category')
-        if cached_category:
-            raw = json.loads(cached_category.response[0])
-            category_ids = [unit['id'] for unit in raw]
-        else:
-            category_ids = [category.id for category in db.session.query(DCategory.id).all()]
+        category_ids = dictionaries.rows(CATEGORY)
 
         validation_errors = {}
         for category_id in data['categories']:
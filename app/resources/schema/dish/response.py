@@ -1,4 +1,8 @@
+from flask import url_for
+from marshmallow import post_dump
+
 from models.db import Dish
+from common.images import image_version
 from app import ma
 
 from resources.schema.dictionary.category.response import CategoryResponseSchema
@@ -50,3 +54,10 @@ class DishResponseSchema(ma.SQLAlchemySchema):
             'href': ma.URLFor('dishimg', values=dict(dish_id='<id>'))
         }
     })
+
+    @post_dump(pass_original=True)
+    def img_version(self, data, dish, **kwargs):
+        version = image_version(dish.id)
+        if version:
+            data['_links']['img']['href'] = url_for('dishimg', dish_id=dish.id, v=version)
+        return data
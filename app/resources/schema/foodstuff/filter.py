@@ -1,15 +1,20 @@
 from flask_restful import abort
 from marshmallow import Schema, fields, ValidationError, validate, types
+from webargs.fields import DelimitedList
 
-from models.db import DStoreSection
-from app import db, cache
+from resources.schema.foodstuff.response import FoodstuffsResponseSchema
+from common.pagination import sparse_fields_errors
+from common.dictionaries import dictionaries, STORE_SECTION
 
 import typing
-import json
 
 
 class FoodstuffFilterSchema(Schema):
     store_section_id = fields.Integer(required=False)
+    q = fields.String(required=False, validate=validate.Length(min=1, max=200))
+    page = fields.Integer(required=False, missing=1, validate=validate.Range(min=1))
+    limit = fields.Integer(required=False, missing=50, validate=validate.Range(min=1, max=100))
+    fields = DelimitedList(fields.String(), required=False)
 
     def handle_error(self, error: ValidationError, __, *, many: bool, **kwargs):
         abort(400, messages=error.messages)
@@ -22,12 +27,7 @@ class FoodstuffFilterSchema(Schema):
         partial: typing.Optional[typing.Union[bool, types.StrSequenceOrSet]] = None
     ) -> typing.Dict[str, typing.List[str]]:
 
-        cached_store_section = cache.get('view//store_section')
-        if cached_store_section:
-            raw = json.loads(cached_store_section.response[0])
-            store_section_ids = [section['id'] for section in raw]
-        else:
-            store_section_ids = [section.id for section in db.session.query(DStoreSection.id).all()]
+        store_section_ids = dictionaries.rows(STORE_SECTION)
 
         validation_errors = {}
         if 'store_section_id' in data.keys() and data['store_section_id'] not in store_section_ids:
@@ -38,4 +38,13 @@ class FoodstuffFilterSchema(Schema):
                     ]
                 }
             )
+        validation_errors.update(sparse_fields_errors(FoodstuffsResponseSchema, data.get('fields')))
         return validation_errors
+
+
+class FoodstuffSuggestFilterSchema(Schema):
+    prefix = fields.String(required=True, validate=validate.Length(min=1, max=100))
+    limit = fields.Integer(required=False, missing=10, validate=validate.Range(min=1, max=50))
+
+    def handle_error(self, error: ValidationError, __, *, many: bool, **kwargs):
+        abort(400, messages=error.messages)
@@ -1,13 +1,13 @@
 from models.db import Foodstuff
 from app import ma
 
-from resources.schema.dictionary.store_section.response import StoreSectionResponseSchema
+from common.dictionaries import dictionaries, STORE_SECTION
 
 
 class FoodstuffsResponseSchema(ma.SQLAlchemySchema):
 
-    def __init__(self):
-        super(FoodstuffsResponseSchema, self).__init__()
+    def __init__(self, *args, **kwargs):
+        super(FoodstuffsResponseSchema, self).__init__(*args, **kwargs)
         self.many = True
 
     class Meta:
@@ -17,7 +17,8 @@ class FoodstuffsResponseSchema(ma.SQLAlchemySchema):
 
     id = ma.auto_field()
     name = ma.auto_field()
-    store_section = ma.Pluck(StoreSectionResponseSchema, 'name')
+    store_section = ma.Function(lambda foodstuff: dictionaries.name(STORE_SECTION, foodstuff.store_section_id))
+    density = ma.auto_field()
 
     _links = ma.Hyperlinks({
         'self': {
@@ -33,7 +34,8 @@ class FoodstuffResponseSchema(ma.SQLAlchemySchema):
 
     id = ma.auto_field()
     name = ma.auto_field()
-    store_section = ma.Pluck(StoreSectionResponseSchema, 'name')
+    store_section = ma.Function(lambda foodstuff: dictionaries.name(STORE_SECTION, foodstuff.store_section_id))
+    density = ma.auto_field()
 
     _links = ma.Hyperlinks({
         'self': {
@@ -2,12 +2,11 @@ from flask_restful import abort
 
 from models.db import Dish, Ingredient, Foodstuff
 from models.db import DCategory, DStage, DUnit, DPrePackType
-from app import db, cache
+from common.dictionaries import dictionaries, UNIT, PRE_PACK_TYPE, STAGE
 
 from marshmallow import Schema, fields, ValidationError, validate, types
 
 import typing
-import json
 
 
 class IngredientRequestSchema(Schema):
@@ -18,8 +17,28 @@ class IngredientRequestSchema(Schema):
     stage_id = fields.Integer(required=False)
     alternative_ids = fields.List(cls_or_instance=fields.Integer(), required=False)
 
+    def __init__(self, *args, **kwargs):
+        super(IngredientRequestSchema, self).__init__(*args, **kwargs)
+        self.units = {}
+        self.pre_pack_types = {}
+        self.stages = {}
+        self.foodstuffs = {}
+
     def handle_error(self, error: ValidationError, __, *, many: bool, **kwargs):
-        abort(400, messages=error.messages)
+        if not many:
+            abort(400, messages=error.messages)
+
+    def resolve(self, rows):
+        self.units = dictionaries.rows(UNIT)
+        self.pre_pack_types = dictionaries.rows(PRE_PACK_TYPE)
+        self.stages = dictionaries.rows(STAGE)
+
+        foodstuff_ids = set()
+        for row in rows:
+            foodstuff_ids.add(row['foodstuff_id'])
+            foodstuff_ids.update(row.get('alternative_ids', []))
+        self.foodstuffs = {foodstuff.id: foodstuff
+                           for foodstuff in Foodstuff.query.filter(Foodstuff.id.in_(foodstuff_ids))}
 
     def validate(
         self,
@@ -29,29 +48,12 @@ class IngredientRequestSchema(Schema):
         partial: typing.Optional[typing.Union[bool, types.StrSequenceOrSet]] = None
     ) -> typing.Dict[str, typing.List[str]]:
 
-        cached_unit = cache.get('view//unit')
-        if cached_unit:
-            raw = json.loads(cached_unit.response[0])
-            unit_ids = [unit['id'] for unit in raw]
-        else:
-            unit_ids = [unit.id for unit in db.session.query(DUnit.id).all()]
-
-        cached_pre_pack_type = cache.get('view//pre_pack_type')
-        if cached_pre_pack_type:
-            raw = json.loads(cached_pre_pack_type.response[0])
-            pre_pack_type_ids = [stage['id'] for stage in raw]
-        else:
-            pre_pack_type_ids = [pre_pack_type.id for pre_pack_type in db.session.query(DPrePackType.id).all()]
-
-        cached_stage = cache.get('view//stage')
-        if cached_stage:
-            raw = json.loads(cached_stage.response[0])
-            stage_ids = [stage['id'] for stage in raw]
-        else:
-            stage_ids = [stage.id for stage in db.session.query(DStage.id).all()]
+        self.resolve([data])
+        return self.row_errors(data)
 
+    def row_errors(self, data):
         validation_errors = {}
-        if data['unit_id'] not in unit_ids:
+        if data['unit_id'] not in self.units:
             validation_errors.update(
                 {
                     'unit_id': [
@@ -60,7 +62,7 @@ class IngredientRequestSchema(Schema):
                 }
             )
 
-        if 'pre_pack_type_id' in data.keys() and data['pre_pack_type_id'] not in pre_pack_type_ids:
+        if 'pre_pack_type_id' in data.keys() and data['pre_pack_type_id'] not in self.pre_pack_types:
             validation_errors.update(
                 {
                     'pre_pack_type_id': [
@@ -69,7 +71,7 @@ class IngredientRequestSchema(Schema):
                 }
             )
 
-        if 'stage_id' in data.keys() and data['stage_id'] not in stage_ids:
+        if 'stage_id' in data.keys() and data['stage_id'] not in self.stages:
             validation_errors.update(
                 {
                     'stage_id': [
@@ -78,8 +80,7 @@ class IngredientRequestSchema(Schema):
                 }
             )
 
-        foodstuff = Foodstuff.query.filter(Foodstuff.id == data['foodstuff_id']).first()
-        if not foodstuff:
+        if data['foodstuff_id'] not in self.foodstuffs:
             validation_errors.update(
                 {
                     'foodstuff_id': [
@@ -89,9 +90,7 @@ class IngredientRequestSchema(Schema):
             )
         if 'alternative_ids' in data.keys():
             for alternative_id in data['alternative_ids']:
-                foodstuff = Foodstuff.query.filter(Foodstuff.id == alternative_id).first()
-
-                if not foodstuff:
+                if alternative_id not in self.foodstuffs:
                     validation_errors.update(
                         {
                             'alternative_id': [
@@ -101,3 +100,76 @@ class IngredientRequestSchema(Schema):
                     )
 
         return validation_errors
+
+    def alternatives(self, data):
+        return [self.foodstuffs[alternative_id] for alternative_id in data.get('alternative_ids', [])]
+
+
+class IngredientListRequestSchema(Schema):
+    ingredients = fields.Nested(IngredientRequestSchema, many=True, required=True)
+
+    def __init__(self, *args, **kwargs):
+        super(IngredientListRequestSchema, self).__init__(*args, **kwargs)
+        self.rows = IngredientRequestSchema()
+
+    def handle_error(self, error: ValidationError, __, *, many: bool, **kwargs):
+        abort(400, messages=error.messages)
+
+    def validate(
+        self,
+        data: typing.Mapping,
+        *,
+        many: typing.Optional[bool] = None,
+        partial: typing.Optional[typing.Union[bool, types.StrSequenceOrSet]] = None
+    ) -> typing.Dict[str, typing.List[str]]:
+
+        self.rows.resolve(data['ingredients'])
+
+        foodstuffs = {}
+        alternatives = {}
+        for index, row in enumerate(data['ingredients']):
+            stage_id = row.get('stage_id')
+            foodstuffs.setdefault((row['foodstuff_id'], stage_id), index)
+            for alternative_id in row.get('alternative_ids', []):
+                alternatives.setdefault((alternative_id, stage_id), index)
+
+        validation_errors = {}
+        for index, row in enumerate(data['ingredients']):
+            row_errors = self.rows.row_errors(row)
+            key = (row['foodstuff_id'], row.get('stage_id'))
+            if foodstuffs[key] != index:
+                row_errors.update(
+                    {
+                        'foodstuff_id': [
+                            f'Already added in row {foodstuffs[key]}'
+                        ]
+                    }
+                )
+            elif alternatives.get(key, index) != index:
+                row_errors.update(
+                    {
+                        'foodstuff_id': [
+                            f'Already added as alternative in row {alternatives[key]}'
+                        ]
+                    }
+                )
+            alternative_ids = row.get('alternative_ids', [])
+            if len(set(alternative_ids)) != len(alternative_ids):
+                row_errors.update(
+                    {
+                        'alternative_ids': [
+                            'Duplicate alternative_id'
+                        ]
+                    }
+                )
+            if row_errors:
+                validation_errors[index] = row_errors
+
+        if validation_errors:
+            return {
+                'ingredients': validation_errors
+            }
+        return {}
+
+    def alternatives(self, row):
+        return [self.rows.foodstuffs[alternative_id] for alternative_id in row.get('alternative_ids', [])]
@@ -2,9 +2,7 @@ from models.db import Ingredient
 from app import ma
 
 from resources.schema.foodstuff.response import FoodstuffResponseSchema
-from resources.schema.dictionary.stage.response import StageResponseSchema
-from resources.schema.dictionary.unit.response import UnitResponseSchema
-from resources.schema.dictionary.pre_pack_type.response import PrePackTypeResponseSchema
+from common.dictionaries import dictionaries, UNIT, STAGE, PRE_PACK_TYPE
 
 
 class IngredientResponseSchema(ma.SQLAlchemySchema):
@@ -13,10 +11,10 @@ class IngredientResponseSchema(ma.SQLAlchemySchema):
         model = Ingredient
 
     foodstuff = ma.Pluck(FoodstuffResponseSchema, 'name')
-    unit = ma.Pluck(UnitResponseSchema, 'name')
+    unit = ma.Function(lambda ingredient: dictionaries.name(UNIT, ingredient.unit_id))
     amount = ma.auto_field()
-    stage = ma.Pluck(StageResponseSchema, 'name')
-    pre_pack_type = ma.Pluck(PrePackTypeResponseSchema, 'name')
+    stage = ma.Function(lambda ingredient: dictionaries.name(STAGE, ingredient.stage_id))
+    pre_pack_type = ma.Function(lambda ingredient: dictionaries.name(PRE_PACK_TYPE, ingredient.pre_pack_type_id))
     alternatives = ma.Pluck(FoodstuffResponseSchema, 'name', many=True)
 
     _links = ma.Hyperlinks({
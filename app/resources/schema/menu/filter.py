@@ -0,0 +1,27 @@
+from flask_restful import abort
+from marshmallow import Schema, fields, ValidationError, validate, types
+from webargs.fields import DelimitedList
+
+from resources.schema.menu.response import MenuResponseSchema
+from common.pagination import sparse_fields_errors
+
+import typing
+
+
+class MenuFilterSchema(Schema):
+    page = fields.Integer(required=False, missing=1, validate=validate.Range(min=1))
+    limit = fields.Integer(required=False, missing=50, validate=validate.Range(min=1, max=100))
+    fields = DelimitedList(fields.String(), required=False)
+
+    def handle_error(self, error: ValidationError, __, *, many: bool, **kwargs):
+        abort(400, messages=error.messages)
+
+    def validate(
+        self,
+        data: typing.Mapping,
+        *,
+        many: typing.Optional[bool] = None,
+        partial: typing.Optional[typing.Union[bool, types.StrSequenceOrSet]] = None
+    ) -> typing.Dict[str, typing.List[str]]:
+
+        return sparse_fields_errors(MenuResponseSchema, data.get('fields'))
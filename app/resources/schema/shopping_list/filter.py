@@ -0,0 +1,36 @@
+from flask_restful import abort
+from marshmallow import Schema, fields, ValidationError, types
+from webargs.fields import DelimitedList
+
+from models.db import Menu
+from app import db
+
+import typing
+
+
+class ShoppingListFilterSchema(Schema):
+    menu_ids = DelimitedList(fields.Integer(), required=True)
+
+    def handle_error(self, error: ValidationError, __, *, many: bool, **kwargs):
+        abort(400, messages=error.messages)
+
+    def validate(
+        self,
+        data: typing.Mapping,
+        *,
+        many: typing.Optional[bool] = None,
+        partial: typing.Optional[typing.Union[bool, types.StrSequenceOrSet]] = None
+    ) -> typing.Dict[str, typing.List[str]]:
+
+        menu_ids = {menu.id for menu in db.session.query(Menu.id).filter(Menu.id.in_(data['menu_ids'])).all()}
+
+        validation_errors = {}
+        if not data['menu_ids'] or menu_ids != set(data['menu_ids']):
+            validation_errors.update(
+                {
+                    'menu_ids': [
+                        'Bad choice for menu_ids'
+                    ]
+                }
+            )
+        return validation_errors
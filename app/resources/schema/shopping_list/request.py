@@ -0,0 +1,11 @@
+from flask_restful import abort
+
+from marshmallow import Schema, fields, ValidationError, validate
+
+
+class ShoppingListPreviewRequestSchema(Schema):
+    portions = fields.Dict(keys=fields.Integer(), values=fields.Integer(validate=validate.Range(min=0)),
+                           required=True, description='Portion overrides by menu dish id')
+
+    def handle_error(self, error: ValidationError, __, *, many: bool, **kwargs):
+        abort(400, messages=error.messages)
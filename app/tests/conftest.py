@@ -0,0 +1,128 @@
+import contextlib
+
+import pytest
+from redis.exceptions import RedisError
+from sqlalchemy import event, exc, text
+
+from app import app, db, redis_client
+
+import common.units
+from common.dictionaries import dictionaries
+from common.units import UnitConversions
+from models.db import Menu, MenuDish, Dish, Ingredient, Foodstuff, DStoreSection, DUnit, DPrePackType, DCategory
+
+
+@pytest.fixture(scope='session')
+def database():
+    with app.app_context():
+        try:
+            migrated = db.session.execute(text("SELECT to_regclass('menu_shopping_list')")).scalar()
+            redis_client.ping()
+        except (exc.SQLAlchemyError, RedisError) as e:
+            pytest.skip(f'database is not available: {e}')
+        finally:
+            db.session.remove()
+    if migrated is None:
+        pytest.skip('database is not migrated, run `flask db upgrade`')
+    return db
+
+
+@pytest.fixture
+def session(database):
+    connection = db.engine.connect()
+    transaction = connection.begin()
+    session = db.create_scoped_session(options={'bind': connection, 'binds': {}})
+    original, db.session = db.session, session
+    dictionaries.version = None
+    common.units.loaded_conversions = UnitConversions(None, {}, {})
+
+    with app.test_request_context():
+        yield session
+
+    session.remove()
+    transaction.rollback()
+    connection.close()
+    db.session = original
+    dictionaries.version = None
+    common.units.loaded_conversions = UnitConversions(None, {}, {})
+
+
+class StatementCounter(object):
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, connection, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@pytest.fixture
+def count_statements(session):
+    @contextlib.contextmanager
+    def counting():
+        counter = StatementCounter()
+        event.listen(db.engine, 'before_cursor_execute', counter)
+        try:
+            yield counter
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', counter)
+
+    return counting
+
+
+@pytest.fixture
+def catalog(session):
+    store_section = DStoreSection(name='test section')
+    unit = DUnit(name='test g', dimension='mass', factor=1)
+    pre_pack_type = DPrePackType(name='test chop')
+    category = DCategory(name='test category')
+    session.add_all([store_section, unit, pre_pack_type, category])
+    session.flush()
+
+    foodstuffs = [Foodstuff(name=f'test foodstuff {i:03}', store_section_id=store_section.id) for i in range(20)]
+    session.add_all(foodstuffs)
+    session.flush()
+
+    return {
+        'store_section': store_section,
+        'unit': unit,
+        'pre_pack_type': pre_pack_type,
+        'category': category,
+        'foodstuffs': foodstuffs
+    }
+
+
+@pytest.fixture
+def make_dish(session, catalog):
+    def make(name, foodstuffs, portion=4, categories=()):
+        dish = Dish(name=name, description='test', portion=portion, cook_time=10, all_time=20,
+                    categories=list(categories))
+        session.add(dish)
+        session.flush()
+        for position, foodstuff in enumerate(foodstuffs):
+            session.add(Ingredient(dish_id=dish.id, foodstuff_id=foodstuff.id, unit_id=catalog['unit'].id,
+                                   amount=position + 1, pre_pack_type_id=catalog['pre_pack_type'].id))
+        session.flush()
+        return dish
+
+    return make
+
+
+@pytest.fixture
+def make_menu(session, catalog, make_dish):
+    def make(dishes, ingredients=5):
+        foodstuffs = catalog['foodstuffs']
+        menu = Menu(name=f'test menu {dishes}')
+        session.add(menu)
+        session.flush()
+        for i in range(dishes):
+            dish = make_dish(f'test dish {i:03}',
+                             [foodstuffs[(i + k) % len(foodstuffs)] for k in range(ingredients)])
+            session.add(MenuDish(menu_id=menu.id, dish_id=dish.id, portion=2))
+        session.flush()
+        return menu
+
+    return make
@@ -0,0 +1,59 @@
+import pytest
+
+import common.dictionaries
+from common.dictionaries import DictionaryRegistry, UNIT
+from resources.schema.ingredient.response import IngredientResponseSchema
+from models.db import Dish, Ingredient, DUnit
+
+from app import app
+
+
+@pytest.fixture
+def version_checks(monkeypatch):
+    checks = {'version': 1, 'count': 0}
+
+    def current_version(name):
+        checks['count'] += 1
+        return checks['version']
+
+    monkeypatch.setattr(common.dictionaries, 'current_version', current_version)
+    return checks
+
+
+def test_version_is_checked_once_per_request(session, catalog, version_checks):
+    registry = DictionaryRegistry()
+    unit = catalog['unit']
+
+    with app.app_context():
+        names = [registry.name(UNIT, unit.id) for _ in range(100)]
+
+    assert names == ['test g'] * 100
+    assert version_checks['count'] == 1
+
+
+def test_next_request_reloads_after_version_change(session, catalog, version_checks):
+    registry = DictionaryRegistry()
+    unit_id = catalog['unit'].id
+    with app.app_context():
+        registry.rows(UNIT)
+
+    session.query(DUnit).filter(DUnit.id == unit_id).update({'name': 'test kg'})
+    with app.app_context():
+        assert registry.name(UNIT, unit_id) == 'test g'
+
+    version_checks['version'] = 2
+    with app.app_context():
+        assert registry.name(UNIT, unit_id) == 'test kg'
+    assert version_checks['count'] == 3
+
+
+def test_ingredient_dump_checks_version_once(session, make_menu, count_statements, version_checks):
+    make_menu(10)
+    ingredients = Ingredient.query.join(Dish).filter(Dish.name.like('test dish %')).all()
+
+    with app.app_context(), count_statements() as counter:
+        dumped = IngredientResponseSchema(only=['unit', 'pre_pack_type']).dump(ingredients, many=True)
+
+    assert {(row['unit'], row['pre_pack_type']) for row in dumped} == {('test g', 'test chop')}
+    assert version_checks['count'] == 1
+    assert counter.count == 5
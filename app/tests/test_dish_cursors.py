@@ -0,0 +1,69 @@
+import base64
+import json
+
+import pytest
+
+from common.dish_filters import encode_cursor, decode_cursor, dishes_page
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+@pytest.mark.parametrize('values, backward, ranked', [
+    (['борщ', 7], False, False),
+    (['борщ', 7], True, False),
+    ([None, 7], False, False),
+    ([0.25, 7], True, True),
+    ([1, 7], False, True)
+])
+def test_cursor_round_trip(values, backward, ranked):
+    assert decode_cursor(encode_cursor(values, backward), ranked) == (values, backward)
+
+
+@pytest.mark.parametrize('cursor, ranked', [
+    ('not base64!', False),
+    (base64.urlsafe_b64encode(b'\xff\xfe').decode(), False),
+    (raw_cursor({'name': 'x'}), False),
+    (raw_cursor([['x', 1, 2], False]), False),
+    (raw_cursor([['x', '1'], False]), False),
+    (raw_cursor([['x', True], False]), False),
+    (raw_cursor([['x', 1], 'no']), False),
+    (raw_cursor([[1, 1], False]), False),
+    (raw_cursor([['x', 1], False]), True),
+    (raw_cursor([[None, 1], False]), True),
+    (raw_cursor([[True, 1], False]), True)
+])
+def test_bad_cursor_is_rejected(cursor, ranked):
+    with pytest.raises(ValueError, match='bad cursor'):
+        decode_cursor(cursor, ranked)
+
+
+@pytest.fixture
+def named_dishes(session, catalog, make_dish):
+    category = catalog['category']
+    dishes = [make_dish(name, [], categories=[category])
+              for name in [None, 'test b', None, 'test a', 'test c', None, 'test b']]
+    return sorted(dishes, key=lambda dish: (dish.name is None, dish.name or '', dish.id), reverse=True)
+
+
+def walk(filters, per_page):
+    pages = []
+    dishes, next_cursor, prev_cursor = dishes_page(filters, per_page)
+    pages.append(dishes)
+    while next_cursor:
+        dishes, next_cursor, prev_cursor = dishes_page(filters, per_page, next_cursor)
+        pages.append(dishes)
+    back = [dishes]
+    while prev_cursor:
+        dishes, _, prev_cursor = dishes_page(filters, per_page, prev_cursor)
+        back.append(dishes)
+    return pages, back[::-1]
+
+
+@pytest.mark.parametrize('per_page', [1, 2, 3])
+def test_pages_walk_through_null_names_both_ways(named_dishes, catalog, per_page):
+    forward, backward = walk({'category_id': catalog['category'].id}, per_page)
+
+    assert [dish.id for page in forward for dish in page] == [dish.id for dish in named_dishes]
+    assert [[dish.id for dish in page] for page in backward] == [[dish.id for dish in page] for page in forward]
@@ -0,0 +1,33 @@
+from models.db import DCategory
+from common.dish_filters import dish_facets
+
+
+def test_facets_with_category_and_foodstuff_filters(session, catalog, make_dish):
+    category = catalog['category']
+    foodstuffs = catalog['foodstuffs']
+    make_dish('test dish a', foodstuffs[:2], categories=[category])
+    make_dish('test dish b', foodstuffs[1:3], categories=[category])
+    make_dish('test dish c', foodstuffs[:1])
+    make_dish('test dish d', foodstuffs[3:4], categories=[category])
+
+    facets = dish_facets({'category_id': category.id, 'foodstuff_ids': [foodstuffs[0].id]})
+
+    assert facets['categories'] == [{'id': category.id, 'name': 'test category', 'count': 1}]
+    assert facets['cook_time'] == [{'from': None, 'to': 15, 'count': 1}]
+    assert facets['all_time'] == [{'from': 15, 'to': 30, 'count': 1}]
+
+
+def test_facets_with_category_filter_count_every_category_of_matching_dishes(session, catalog, make_dish):
+    category = catalog['category']
+    other = DCategory(name='test other category')
+    session.add(other)
+    session.flush()
+    make_dish('test dish a', catalog['foodstuffs'][:1], categories=[category, other])
+    make_dish('test dish b', catalog['foodstuffs'][:1], categories=[other])
+
+    facets = dish_facets({'category_id': category.id})
+
+    assert facets['categories'] == [
+        {'id': category.id, 'name': 'test category', 'count': 1},
+        {'id': other.id, 'name': 'test other category', 'count': 1}
+    ]
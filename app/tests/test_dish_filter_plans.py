@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from common.dish_filters import dishes_page_query
+
+DISHES = 20000
+FILTERED_DISHES = 10
+
+SEED = [
+    """
+    INSERT INTO dish (name, description, portion, cook_time, all_time)
+    SELECT 'test plan dish ' || lpad(n::text, 5, '0'), 'test', 4, 10, 20 FROM generate_series(1, :dishes) AS n
+    """,
+    """
+    INSERT INTO dish_categories (dish_id, category_id)
+    SELECT d.id, c.id FROM dish d, d_category c
+    WHERE d.name LIKE 'test plan dish %' AND c.name = 'test plan category'
+    """,
+    """
+    INSERT INTO dish_categories (dish_id, category_id)
+    SELECT d.id, :category_id FROM dish d
+    WHERE d.name LIKE 'test plan dish %' AND d.id % (:dishes / :filtered) = 0
+    """,
+    """
+    INSERT INTO ingredient (dish_id, foodstuff_id, unit_id, amount)
+    SELECT d.id, f.id, :unit_id, 1 FROM dish d, foodstuff f
+    WHERE d.name LIKE 'test plan dish %' AND f.name = 'test plan foodstuff'
+    """,
+    """
+    INSERT INTO ingredient (dish_id, foodstuff_id, unit_id, amount)
+    SELECT d.id, :foodstuff_id, :unit_id, 1 FROM dish d
+    WHERE d.name LIKE 'test plan dish %' AND d.id % (:dishes / :filtered) = 0
+    """
+]
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def explain(session, query):
+    sql = query.statement.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True})
+    plan = session.execute(text(f'EXPLAIN (FORMAT JSON) {sql}')).scalar()
+    return list(plan_nodes(plan[0]['Plan']))
+
+
+def index_names(nodes):
+    return {node['Index Name'] for node in nodes if 'Index Name' in node}
+
+
+def seq_scans(nodes):
+    return [node['Relation Name'] for node in nodes if node['Node Type'] == 'Seq Scan']
+
+
+@pytest.fixture
+def plan_catalog(session, catalog):
+    session.execute(text("INSERT INTO d_category (name) VALUES ('test plan category')"))
+    session.execute(text("INSERT INTO foodstuff (name) VALUES ('test plan foodstuff')"))
+    params = {'dishes': DISHES, 'filtered': FILTERED_DISHES, 'category_id': catalog['category'].id,
+              'foodstuff_id': catalog['foodstuffs'][0].id, 'unit_id': catalog['unit'].id}
+    for statement in SEED:
+        session.execute(text(statement), params)
+    session.execute(text('ANALYZE dish, dish_categories, ingredient'))
+    return catalog
+
+
+def test_category_filter_uses_category_index(session, plan_catalog):
+    query, _ = dishes_page_query({'category_id': plan_catalog['category'].id}, 20)
+    nodes = explain(session, query)
+
+    assert 'ix_dish_categories_category_id_dish_id' in index_names(nodes)
+    assert 'dish_categories' not in seq_scans(nodes)
+
+
+def test_foodstuffs_filter_uses_ingredient_index(session, plan_catalog):
+    foodstuff_ids = [foodstuff.id for foodstuff in plan_catalog['foodstuffs'][:3]]
+    query, _ = dishes_page_query({'foodstuff_ids': foodstuff_ids}, 20)
+    nodes = explain(session, query)
+
+    assert 'ix_ingredient_foodstuff_id_dish_id' in index_names(nodes)
+    assert 'ingredient' not in seq_scans(nodes)
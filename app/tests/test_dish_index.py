@@ -0,0 +1,79 @@
+import pytest
+
+import common.dish_index
+from models.db import Ingredient
+from common.dish_index import DishIndex
+
+
+@pytest.fixture
+def changes(monkeypatch):
+    changes = {'version': 1, 'changed': None}
+    monkeypatch.setattr(common.dish_index, 'changes_since',
+                        lambda name, since: (changes['version'], changes['changed']))
+    return changes
+
+
+@pytest.fixture
+def dishes(session, catalog, make_dish):
+    foodstuffs = catalog['foodstuffs']
+    soup = make_dish('test soup', foodstuffs[0:4])
+    salad = make_dish('test salad', foodstuffs[2:4])
+    stew = make_dish('test stew', foodstuffs[4:6])
+    ingredient = Ingredient.query.filter(Ingredient.dish_id == stew.id,
+                                         Ingredient.foodstuff_id == foodstuffs[5].id).one()
+    ingredient.alternatives = [foodstuffs[7]]
+    session.flush()
+    return soup, salad, stew
+
+
+def ranked_sets(ranked):
+    return [(dish_id, coverage, set(missing)) for dish_id, coverage, missing in ranked]
+
+
+def test_cookable_ranks_by_coverage_then_missing_then_id(changes, catalog, dishes):
+    soup, salad, stew = dishes
+    foodstuffs = catalog['foodstuffs']
+
+    ranked = DishIndex().cookable([foodstuffs[2].id, foodstuffs[3].id, foodstuffs[4].id], 10)
+
+    assert ranked_sets(ranked) == [
+        (salad.id, 1.0, set()),
+        (stew.id, 0.5, {frozenset([foodstuffs[5].id, foodstuffs[7].id])}),
+        (soup.id, 0.5, {frozenset([foodstuffs[0].id]), frozenset([foodstuffs[1].id])})
+    ]
+
+
+def test_cookable_counts_alternatives_and_applies_limit(changes, catalog, dishes):
+    soup, salad, stew = dishes
+    foodstuffs = catalog['foodstuffs']
+
+    assert DishIndex().cookable([foodstuffs[4].id, foodstuffs[7].id], 1) == [(stew.id, 1.0, [])]
+
+
+def test_cookable_without_known_foodstuffs_is_empty(changes, catalog, dishes):
+    assert DishIndex().cookable([catalog['foodstuffs'][19].id], 10) == []
+
+
+def test_refresh_reloads_changed_dishes_only(session, changes, catalog, dishes):
+    soup, salad, stew = dishes
+    foodstuffs = catalog['foodstuffs']
+    index = DishIndex()
+    index.cookable([foodstuffs[2].id], 10)
+    positions = dict(index.positions)
+    needs = len(index.need_foodstuffs)
+
+    Ingredient.query.filter(Ingredient.dish_id == salad.id, Ingredient.foodstuff_id == foodstuffs[3].id).delete()
+    Ingredient.query.filter(Ingredient.dish_id == stew.id, Ingredient.foodstuff_id == foodstuffs[4].id).delete()
+    session.flush()
+    changes['version'], changes['changed'] = 2, {salad.id, stew.id}
+
+    ranked = index.cookable([foodstuffs[2].id, foodstuffs[7].id], 10)
+
+    assert ranked_sets(ranked) == [
+        (salad.id, 1.0, set()),
+        (stew.id, 1.0, set()),
+        (soup.id, 0.25, {frozenset([foodstuffs[0].id]), frozenset([foodstuffs[1].id]),
+                         frozenset([foodstuffs[3].id])})
+    ]
+    assert index.positions == positions
+    assert len(index.need_foodstuffs) == needs + 2
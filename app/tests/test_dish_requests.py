@@ -0,0 +1,32 @@
+import pytest
+
+from app import app
+
+from models.db import Dish
+
+
+@pytest.fixture
+def client(session):
+    return app.test_client()
+
+
+def dish_json(catalog, **fields):
+    return dict({'name': 'test request dish', 'description': 'test', 'portion': 4, 'cook_time': 10,
+                 'all_time': 20, 'categories': [catalog['category'].id, catalog['category'].id]}, **fields)
+
+
+def test_post_ignores_duplicate_category_ids(client, catalog):
+    response = client.post('/dishes', json=dish_json(catalog))
+
+    assert response.status_code == 201
+    dish = Dish.query.filter(Dish.name == 'test request dish').one()
+    assert [category.id for category in dish.categories] == [catalog['category'].id]
+
+
+def test_put_ignores_duplicate_category_ids(client, catalog, make_dish):
+    dish = make_dish('test request dish', [])
+
+    response = client.put(f'/dishes/{dish.id}', json=dish_json(catalog))
+
+    assert response.status_code == 200
+    assert [category.id for category in Dish.query.get(dish.id).categories] == [catalog['category'].id]
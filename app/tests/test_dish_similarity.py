@@ -0,0 +1,68 @@
+import pytest
+
+from models.db import Ingredient
+from common.dish_similarity import DishSimilarity, dish_foodstuffs, signature, PERMUTATIONS, BANDS
+
+
+def estimate(first, second):
+    return sum(1 for a, b in zip(signature(first), signature(second)) if a == b) / PERMUTATIONS
+
+
+def test_signature_depends_on_set_only():
+    assert signature([3, 1, 2]) == signature({1, 2, 3}) == signature([1, 1, 2, 3])
+    assert len(signature([1])) == PERMUTATIONS
+
+
+@pytest.mark.parametrize('first, second, jaccard', [
+    (range(0, 100), range(0, 100), 1.0),
+    (range(0, 100), range(50, 150), 1 / 3),
+    (range(0, 100), range(20, 100), 0.8),
+    (range(0, 100), range(100, 200), 0.0)
+])
+def test_signature_agreement_estimates_jaccard(first, second, jaccard):
+    assert estimate(first, second) == pytest.approx(jaccard, abs=0.2)
+
+
+@pytest.fixture
+def index():
+    index = DishSimilarity()
+    index.refresh = lambda: None
+    index.add(1, signature(range(0, 20)))
+    index.add(2, signature(range(0, 20)))
+    index.add(3, signature(range(0, 18)))
+    index.add(4, signature(range(100, 120)))
+    return index
+
+
+def test_similar_ranks_by_signature_agreement_then_id(index):
+    similar = index.similar(1, 10)
+
+    assert similar[0] == (2, 1.0)
+    assert similar[1][0] == 3 and 0.5 < similar[1][1] < 1.0
+    assert 4 not in [dish_id for dish_id, _ in similar]
+
+
+def test_similar_applies_limit_and_skips_unknown_dish(index):
+    assert index.similar(1, 1) == [(2, 1.0)]
+    assert index.similar(99, 10) is None
+
+
+def test_remove_drops_dish_from_every_band(index):
+    index.remove(2)
+    index.remove(4)
+    index.remove(42)
+
+    assert [dish_id for dish_id, _ in index.similar(1, 10)] == [3]
+    assert all(2 not in members and 4 not in members
+               for buckets in index.buckets for members in buckets.values())
+    assert sum(len(buckets) for buckets in index.buckets) <= 2 * BANDS
+
+
+def test_dish_foodstuffs_skip_ingredients_without_foodstuff(session, catalog, make_dish):
+    foodstuffs = catalog['foodstuffs']
+    dish = make_dish('test legacy dish', foodstuffs[:2])
+    session.add(Ingredient(dish_id=dish.id, foodstuff_id=None, unit_id=catalog['unit'].id, amount=1))
+    session.flush()
+
+    assert dish_foodstuffs([dish.id]) == {dish.id: {foodstuffs[0].id, foodstuffs[1].id}}
+    assert signature(dish_foodstuffs([dish.id])[dish.id]) == signature([foodstuffs[0].id, foodstuffs[1].id])
@@ -0,0 +1,70 @@
+import pytest
+
+from common.dish_filters import dishes_page, dish_facets, encode_cursor
+from common.dish_snapshot import DishSnapshot
+
+
+@pytest.fixture
+def category_dishes(session, catalog, make_dish):
+    category = catalog['category']
+    for number, name in enumerate([None, 'test b', None, 'test a', 'test c', None, 'test b', 'test d']):
+        dish = make_dish(name, [], categories=[category])
+        dish.cook_time = 10 * number
+        dish.all_time = None if number == 3 else 50 * number
+    session.flush()
+    return category
+
+
+def snapshot_pages(snapshot, filters, per_page, cursor=None):
+    pages = []
+    while True:
+        dishes, next_cursor, prev_cursor = snapshot.page(filters, per_page, cursor)
+        pages.append(([dish.id for dish in dishes], next_cursor, prev_cursor))
+        if not next_cursor:
+            return pages
+        cursor = next_cursor
+
+
+def sql_pages(filters, per_page, cursor=None):
+    pages = []
+    while True:
+        dishes, next_cursor, prev_cursor = dishes_page(filters, per_page, cursor)
+        pages.append(([dish.id for dish in dishes], next_cursor, prev_cursor))
+        if not next_cursor:
+            return pages
+        cursor = next_cursor
+
+
+@pytest.mark.parametrize('per_page', [1, 2, 3])
+@pytest.mark.parametrize('extra', [{}, {'cook_time': 40}, {'all_time': 300}])
+def test_snapshot_pages_match_sql_pages(category_dishes, per_page, extra):
+    filters = dict(extra, category_id=category_dishes.id)
+
+    assert snapshot_pages(DishSnapshot(), filters, per_page) == sql_pages(filters, per_page)
+
+
+@pytest.mark.parametrize('per_page', [1, 2, 3])
+def test_snapshot_backward_pages_match_sql_pages(category_dishes, per_page):
+    filters = {'category_id': category_dishes.id}
+    snapshot = DishSnapshot()
+
+    for _, _, prev_cursor in snapshot_pages(snapshot, filters, per_page)[1:]:
+        dishes, next_cursor, prev = snapshot.page(filters, per_page, prev_cursor)
+        expected, expected_next, expected_prev = dishes_page(filters, per_page, prev_cursor)
+        assert ([dish.id for dish in dishes], next_cursor, prev) == \
+            ([dish.id for dish in expected], expected_next, expected_prev)
+
+
+def test_snapshot_leaves_stale_cursor_to_sql(category_dishes):
+    filters = {'category_id': category_dishes.id}
+    snapshot = DishSnapshot()
+    dishes, _, _ = snapshot.page(filters, 8)
+
+    assert snapshot.page(filters, 2, encode_cursor(['renamed', dishes[0].id])) is None
+    assert snapshot.page(filters, 2, encode_cursor([None, dishes[-1].id])) is None
+
+
+def test_snapshot_facets_match_sql_facets(category_dishes):
+    filters = {'category_id': category_dishes.id, 'cook_time': 50}
+
+    assert DishSnapshot().facets(filters) == dish_facets(filters)
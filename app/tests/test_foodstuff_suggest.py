@@ -0,0 +1,45 @@
+import pytest
+
+import common.foodstuff_suggest
+from models.db import Foodstuff
+from common.foodstuff_suggest import FoodstuffPrefixIndex
+
+
+@pytest.fixture
+def foodstuffs(session, catalog):
+    foodstuffs = [Foodstuff(name=name, store_section_id=catalog['store_section'].id)
+                  for name in ['Молоко', 'молоко топлёное', 'Молочная смесь', 'Мука', 'мёд', None]]
+    session.add_all(foodstuffs)
+    session.flush()
+    return foodstuffs
+
+
+def test_suggest_matches_prefix_case_insensitively_in_name_order(foodstuffs):
+    milk, baked_milk, formula, flour, honey, _ = foodstuffs
+
+    assert FoodstuffPrefixIndex().suggest('МОЛ', 10) == [
+        (milk.id, 'Молоко'),
+        (baked_milk.id, 'молоко топлёное'),
+        (formula.id, 'Молочная смесь')
+    ]
+
+
+def test_suggest_applies_limit_and_stops_at_prefix_end(foodstuffs):
+    index = FoodstuffPrefixIndex()
+
+    assert [name for _, name in index.suggest('м', 2)] == ['Молоко', 'молоко топлёное']
+    assert index.suggest('молоко ', 10) == [(foodstuffs[1].id, 'молоко топлёное')]
+    assert index.suggest('молокозавод', 10) == []
+
+
+def test_suggest_reloads_when_foodstuff_version_changes(session, foodstuffs, monkeypatch):
+    versions = iter([1, 1, 2])
+    monkeypatch.setattr(common.foodstuff_suggest, 'current_version', lambda name: next(versions))
+    index = FoodstuffPrefixIndex()
+    index.suggest('мук', 10)
+
+    foodstuffs[3].name = 'Мускатный орех'
+    session.flush()
+
+    assert [name for _, name in index.suggest('мук', 10)] == ['Мука']
+    assert [name for _, name in index.suggest('мук', 10)] == []
@@ -0,0 +1,120 @@
+import pytest
+from redis.exceptions import RedisError
+
+from app import app
+
+import resources.Ingredient
+from models.db import Ingredient, DStage
+
+
+@pytest.fixture
+def client(session):
+    return app.test_client()
+
+
+def test_bulk_row_errors_are_keyed_by_row_index(client, catalog, make_dish):
+    dish = make_dish('test dish', [])
+    foodstuff_id = catalog['foodstuffs'][0].id
+    unit_id = catalog['unit'].id
+
+    response = client.put(f'/dishes/{dish.id}/ingredients', json={
+        'ingredients': [
+            {'foodstuff_id': foodstuff_id, 'amount': 1, 'unit_id': unit_id},
+            {'foodstuff_id': foodstuff_id, 'amount': 'many'},
+            {'foodstuff_id': foodstuff_id, 'amount': 2, 'unit_id': unit_id}
+        ]
+    })
+
+    assert response.status_code == 400
+    assert response.get_json()['messages'] == {
+        'ingredients': {
+            '1': {
+                'amount': ['Not a valid number.'],
+                'unit_id': ['Missing data for required field.']
+            }
+        }
+    }
+
+
+def test_bulk_duplicates_are_reported_per_row(client, catalog, make_dish):
+    dish = make_dish('test dish', [])
+    foodstuffs = catalog['foodstuffs']
+    unit_id = catalog['unit'].id
+
+    response = client.put(f'/dishes/{dish.id}/ingredients', json={
+        'ingredients': [
+            {'foodstuff_id': foodstuffs[0].id, 'amount': 1, 'unit_id': unit_id,
+             'alternative_ids': [foodstuffs[1].id]},
+            {'foodstuff_id': foodstuffs[0].id, 'amount': 2, 'unit_id': unit_id},
+            {'foodstuff_id': foodstuffs[1].id, 'amount': 3, 'unit_id': unit_id}
+        ]
+    })
+
+    assert response.status_code == 400
+    assert response.get_json()['messages'] == {
+        'ingredients': {
+            '1': {'foodstuff_id': ['Already added in row 0']},
+            '2': {'foodstuff_id': ['Already added as alternative in row 0']}
+        }
+    }
+
+
+def test_single_ingredient_errors_are_not_wrapped(client, catalog, make_dish):
+    dish = make_dish('test dish', [])
+
+    response = client.post(f'/dishes/{dish.id}/ingredients', json={'foodstuff_id': catalog['foodstuffs'][0].id})
+
+    assert response.status_code == 400
+    assert set(response.get_json()['messages']) == {'amount', 'unit_id'}
+
+
+@pytest.fixture
+def stages(session):
+    stages = [DStage(name='test stage 1'), DStage(name='test stage 2')]
+    session.add_all(stages)
+    session.flush()
+    return stages
+
+
+@pytest.fixture
+def staged_dish(client, catalog, make_dish, stages):
+    dish = make_dish('test dish', [])
+    foodstuffs = catalog['foodstuffs']
+    unit_id = catalog['unit'].id
+    response = client.put(f'/dishes/{dish.id}/ingredients', json={
+        'ingredients': [
+            {'foodstuff_id': foodstuffs[0].id, 'amount': 1, 'unit_id': unit_id, 'stage_id': stages[0].id,
+             'alternative_ids': [foodstuffs[1].id]},
+            {'foodstuff_id': foodstuffs[2].id, 'amount': 2, 'unit_id': unit_id, 'stage_id': stages[1].id}
+        ]
+    })
+    assert response.status_code == 200
+    return dish, [ingredient.id for ingredient in Ingredient.query.filter(Ingredient.dish_id == dish.id)
+                  .order_by(Ingredient.id)]
+
+
+@pytest.mark.parametrize('stage, status_code', [(0, 400), (1, 200)])
+def test_put_checks_alternatives_of_the_same_stage(client, catalog, stages, staged_dish, stage, status_code):
+    dish, ingredient_ids = staged_dish
+
+    response = client.put(f'/dishes/{dish.id}/ingredients/{ingredient_ids[1]}', json={
+        'foodstuff_id': catalog['foodstuffs'][1].id, 'amount': 2, 'unit_id': catalog['unit'].id,
+        'stage_id': stages[stage].id
+    })
+
+    assert response.status_code == status_code
+
+
+def test_redis_errors_after_commit_do_not_fail_request(client, catalog, make_dish, monkeypatch):
+    def bump(name, *ids):
+        raise RedisError('test redis is down')
+
+    monkeypatch.setattr(resources.Ingredient, 'bump', bump)
+    dish = make_dish('test dish', [])
+
+    response = client.post(f'/dishes/{dish.id}/ingredients', json={
+        'foodstuff_id': catalog['foodstuffs'][0].id, 'amount': 1, 'unit_id': catalog['unit'].id
+    })
+
+    assert response.status_code == 201
+    assert Ingredient.query.filter(Ingredient.dish_id == dish.id).count() == 1
@@ -0,0 +1,64 @@
+import collections
+
+import pytest
+
+import common.menu_lists
+from common.menu_lists import merged_records
+from common.units import UnitConversions
+
+Unit = collections.namedtuple('Unit', ['id', 'name', 'dimension', 'factor'])
+Row = collections.namedtuple('Row', ['store_section', 'good', 'foodstuff_id', 'unit_id', 'unit', 'amount'])
+
+UNITS = {
+    1: Unit(1, 'g', 'mass', 1),
+    2: Unit(2, 'kg', 'mass', 1000),
+    5: Unit(5, 'pcs', 'count', 1)
+}
+
+
+@pytest.fixture(autouse=True)
+def conversions(monkeypatch):
+    monkeypatch.setattr(common.menu_lists, 'unit_conversions', lambda: UnitConversions(1, UNITS, {}))
+
+
+def test_rows_of_one_key_are_merged_into_one_record_per_unit_group():
+    rows = [
+        Row('Бакалея', 'мука', 1, 2, 'kg', 1),
+        Row('Бакалея', 'мука', 1, 1, 'g', 500),
+        Row('Бакалея', 'соль', 2, 1, 'g', 10),
+        Row('Овощи', 'лук', 3, 5, 'pcs', 2),
+        Row('Овощи', 'лук', 3, 1, 'g', 100),
+        Row('Овощи', 'лук', 3, 5, 'pcs', 1)
+    ]
+
+    assert list(merged_records(iter(rows), 'store_section', 'good')) == [
+        ('Бакалея', 'мука', 1.5, 'kg'),
+        ('Бакалея', 'соль', 10, 'g'),
+        ('Овощи', 'лук', 3, 'pcs'),
+        ('Овощи', 'лук', 100, 'g')
+    ]
+
+
+def test_same_good_in_another_section_is_a_new_record():
+    rows = [
+        Row('Бакалея', 'соль', 2, 1, 'g', 10),
+        Row('Овощи', 'соль', 2, 1, 'g', 5)
+    ]
+
+    assert list(merged_records(rows, 'store_section', 'good')) == [
+        ('Бакалея', 'соль', 10, 'g'),
+        ('Овощи', 'соль', 5, 'g')
+    ]
+
+
+def test_no_rows_no_records():
+    assert list(merged_records([], 'store_section', 'good')) == []
+
+
+def test_records_are_produced_lazily():
+    def rows():
+        yield Row('Бакалея', 'мука', 1, 1, 'g', 1)
+        yield Row('Бакалея', 'соль', 2, 1, 'g', 1)
+        raise AssertionError('read past the first finished record')
+
+    assert next(merged_records(rows(), 'store_section', 'good')) == ('Бакалея', 'мука', 1, 'g')
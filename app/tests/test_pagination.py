@@ -0,0 +1,61 @@
+import pytest
+
+import common.pagination
+
+from app import app
+
+from models.db import Menu
+
+
+@pytest.fixture
+def client(session):
+    return app.test_client()
+
+
+@pytest.mark.parametrize('page, limit, count, has_next', [
+    (1, 7, 7, True),
+    (2, 7, 7, True),
+    (3, 7, 6, False),
+    (2, 10, 10, False),
+    (1, 20, 20, False),
+    (5, 10, 0, False)
+])
+def test_next_link_follows_fetched_rows(client, catalog, page, limit, count, has_next):
+    response = client.get(f'/foodstuffs?store_section_id={catalog["store_section"].id}&page={page}&limit={limit}')
+    body = response.get_json()
+
+    assert response.status_code == 200
+    assert len(body['data']) == count
+    assert (body['_links']['next']['href'] is not None) == has_next
+    assert body['pagination']['total'] == 20
+    assert response.headers['X-Total-Count'] == '20'
+    assert ('rel="next"' in response.headers['Link']) == has_next
+
+
+def test_estimated_total_does_not_decide_next_link(client, monkeypatch):
+    monkeypatch.setattr(common.pagination, 'estimated_count', lambda table: 10 ** 6)
+    response = client.get('/foodstuffs?page=100&limit=20')
+    body = response.get_json()
+
+    assert body['data'] == []
+    assert body['_links']['next']['href'] is None
+    assert body['pagination']['total'] == 10 ** 6
+
+
+@pytest.mark.parametrize('page, has_prev, has_next', [
+    (1, False, True),
+    (2, True, False)
+])
+def test_menu_list_links_pages_in_header(client, session, page, has_prev, has_next):
+    session.add_all([Menu(name=f'test page menu {i}') for i in range(3)])
+    session.flush()
+    limit = Menu.query.count() - 1
+
+    response = client.get(f'/menus?page={page}&limit={limit}')
+    links = response.headers['Link']
+
+    assert response.status_code == 200
+    assert len(response.get_json()) == (limit if page == 1 else 1)
+    assert ('rel="prev"' in links) == has_prev
+    assert ('rel="next"' in links) == has_next
+    assert f'</menus?page={page}&limit={limit}>; rel="self"' in links
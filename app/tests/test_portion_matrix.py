@@ -0,0 +1,31 @@
+from models.db import MenuDish
+from common.menu_lists import shopping_list, shopping_list_query
+from common.portion_matrix import PortionMatrix, menu_portions, shopping_rows
+
+
+def test_product_matches_shopping_list_query(make_menu):
+    menu = make_menu(10)
+
+    vector = PortionMatrix().product(menu_portions([menu.id]))
+
+    assert shopping_list(shopping_rows(vector)) == shopping_list(shopping_list_query(menu.id))
+
+
+def test_product_scales_rows_by_portion(session, catalog, make_dish):
+    dish = make_dish('test matrix dish', catalog['foodstuffs'][:2], portion=4)
+    matrix = PortionMatrix()
+
+    vector = matrix.product([(dish.id, 2), (dish.id, 6)])
+
+    assert list(vector.values()) == [2.0, 4.0]
+
+
+def test_product_skips_dishes_with_zero_portion(session, catalog, make_menu, make_dish):
+    menu = make_menu(1)
+    dish = make_dish('test empty portion', catalog['foodstuffs'][10:12], portion=0)
+    session.add(MenuDish(menu_id=menu.id, dish_id=dish.id, portion=2))
+    session.flush()
+
+    vector = PortionMatrix().product(menu_portions([menu.id]))
+
+    assert shopping_list(shopping_rows(vector)) == shopping_list(shopping_list_query(menu.id))
@@ -0,0 +1,21 @@
+import pytest
+
+from common.menu_lists import pre_pack_list, pre_pack_list_query
+
+
+@pytest.mark.parametrize('dishes', [1, 10, 100])
+def test_pre_pack_list_query_count_does_not_grow_with_dishes(make_menu, count_statements, dishes):
+    menu = make_menu(dishes)
+    pre_pack_list(pre_pack_list_query(menu.id))
+
+    with count_statements() as counter:
+        result = pre_pack_list(pre_pack_list_query(menu.id))
+
+    assert counter.count == 1
+    assert len(result) == dishes
+    assert result['test dish 000'] == {
+        'portion': 2,
+        'test chop': {
+            f'test foodstuff {i:03}': [{'amount': (i + 1) / 2, 'unit': 'test g'}] for i in range(5)
+        }
+    }
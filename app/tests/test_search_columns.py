@@ -0,0 +1,14 @@
+from models.db import Dish, Foodstuff
+
+
+def test_search_vectors_are_not_loaded_with_rows(session, make_dish, catalog, count_statements):
+    dish_id = make_dish('test borscht', catalog['foodstuffs'][:1]).id
+    foodstuff_id = catalog['foodstuffs'][0].id
+    session.expunge_all()
+
+    with count_statements() as counter:
+        Dish.query.get(dish_id)
+        Foodstuff.query.get(foodstuff_id)
+
+    assert counter.count == 2
+    assert not [statement for statement in counter.statements if 'search' in statement]
@@ -0,0 +1,62 @@
+from models.db import Ingredient, MenuDish, MenuShoppingItem
+from common.menu_lists import shopping_list, shopping_list_query, materialized_shopping_list_query, \
+    rebuild_shopping_list, shopping_list_delta, pre_pack_list, pre_pack_list_query
+
+
+def test_delta_keeps_materialized_list_in_sync(session, make_menu):
+    menu = make_menu(3)
+    rebuild_shopping_list(menu.id)
+    ingredient = Ingredient.query.join(Ingredient.dish).filter(Ingredient.dish.has(name='test dish 001')).first()
+
+    shopping_list_delta(-1, Ingredient.id == ingredient.id)
+    ingredient.amount = 10
+    session.flush()
+    shopping_list_delta(1, Ingredient.id == ingredient.id)
+
+    assert shopping_list(materialized_shopping_list_query([menu.id])) == shopping_list(shopping_list_query(menu.id))
+
+
+def test_delta_skips_legacy_rows_without_foodstuff_or_unit(session, catalog, make_menu):
+    menu = make_menu(1)
+    dish_id = menu.menu_dishes[0].dish_id
+    session.add_all([
+        Ingredient(dish_id=dish_id, foodstuff_id=catalog['foodstuffs'][10].id, unit_id=None, amount=1),
+        Ingredient(dish_id=dish_id, foodstuff_id=None, unit_id=catalog['unit'].id, amount=1)
+    ])
+    session.flush()
+
+    rebuild_shopping_list(menu.id)
+    shopping_list_delta(-1, Ingredient.dish_id == dish_id)
+
+    assert MenuShoppingItem.query.filter(MenuShoppingItem.menu_id == menu.id).count() == 0
+
+
+def test_delta_skips_ingredients_without_amount(session, catalog, make_menu):
+    menu = make_menu(1)
+    dish_id = menu.menu_dishes[0].dish_id
+    session.add(Ingredient(dish_id=dish_id, foodstuff_id=catalog['foodstuffs'][10].id,
+                           unit_id=catalog['unit'].id, amount=None))
+    session.flush()
+
+    rebuild_shopping_list(menu.id)
+    stored = shopping_list(materialized_shopping_list_query([menu.id]))
+
+    assert stored == shopping_list(shopping_list_query(menu.id))
+    assert MenuShoppingItem.query.filter(MenuShoppingItem.menu_id == menu.id,
+                                         MenuShoppingItem.amount.is_(None)).count() == 0
+    shopping_list_delta(-1, Ingredient.dish_id == dish_id)
+    assert MenuShoppingItem.query.filter(MenuShoppingItem.menu_id == menu.id).count() == 0
+
+
+def test_delta_skips_dishes_with_zero_portion(session, catalog, make_menu, make_dish):
+    menu = make_menu(1)
+    dish = make_dish('test empty portion', catalog['foodstuffs'][10:12], portion=0)
+    session.add(MenuDish(menu_id=menu.id, dish_id=dish.id, portion=2))
+    session.flush()
+
+    rebuild_shopping_list(menu.id)
+    shopping_list_delta(1, Ingredient.dish_id == dish.id)
+    shopping_list_delta(-1, Ingredient.dish_id == dish.id)
+
+    assert shopping_list(materialized_shopping_list_query([menu.id])) == shopping_list(shopping_list_query(menu.id))
+    assert 'test empty portion' not in pre_pack_list(pre_pack_list_query(menu.id))
@@ -0,0 +1,51 @@
+import pytest
+
+from models.db import Menu, MenuDish, Ingredient, Foodstuff, DUnit
+from common.menu_lists import shopping_list, shopping_list_query, materialized_shopping_list_query, \
+    rebuild_shopping_list
+
+
+@pytest.mark.parametrize('dishes', [1, 10, 100])
+def test_shopping_list_query_count_does_not_grow_with_dishes(make_menu, count_statements, dishes):
+    menu = make_menu(dishes)
+    shopping_list(shopping_list_query(menu.id))
+
+    with count_statements() as counter:
+        result = shopping_list(shopping_list_query(menu.id))
+
+    assert counter.count == 1
+    assert len(result['test section']) == min(dishes + 4, 20)
+
+
+@pytest.mark.parametrize('dishes', [1, 10, 100])
+def test_materialized_shopping_list_query_count_does_not_grow_with_dishes(make_menu, count_statements, dishes):
+    menu = make_menu(dishes)
+    rebuild_shopping_list(menu.id)
+    expected = shopping_list(shopping_list_query(menu.id))
+
+    with count_statements() as counter:
+        result = shopping_list(materialized_shopping_list_query([menu.id]))
+
+    assert counter.count == 1
+    assert result == expected
+
+
+def test_same_named_foodstuffs_convert_with_their_own_density(session, catalog, make_dish):
+    volume = DUnit(name='test ml', dimension='volume', factor=1)
+    milk = Foodstuff(name='test same name', store_section_id=catalog['store_section'].id, density=1.03)
+    other = Foodstuff(name='test same name', store_section_id=catalog['store_section'].id)
+    menu = Menu(name='test same names')
+    session.add_all([volume, milk, other, menu])
+    session.flush()
+    dish = make_dish('test same names dish', [])
+    session.add_all([Ingredient(dish_id=dish.id, foodstuff_id=milk.id, unit_id=volume.id, amount=200),
+                     Ingredient(dish_id=dish.id, foodstuff_id=other.id, unit_id=catalog['unit'].id, amount=50),
+                     MenuDish(menu_id=menu.id, dish_id=dish.id, portion=4)])
+    session.flush()
+
+    result = shopping_list(shopping_list_query(menu.id))
+
+    assert result['test section']['test same name'] == [
+        {'amount': 200, 'unit': 'test ml'},
+        {'amount': 50, 'unit': 'test g'}
+    ]
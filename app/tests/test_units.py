@@ -0,0 +1,90 @@
+import collections
+
+import pytest
+
+from common.units import UnitConversions, add_need
+
+Unit = collections.namedtuple('Unit', ['id', 'name', 'dimension', 'factor'])
+
+UNITS = {
+    1: Unit(1, 'g', 'mass', 1),
+    2: Unit(2, 'kg', 'mass', 1000),
+    3: Unit(3, 'ml', 'volume', 1),
+    4: Unit(4, 'l', 'volume', 1000),
+    5: Unit(5, 'pcs', 'count', 1),
+    6: Unit(6, 'pinch', None, None)
+}
+MILK = 10
+SALT = 11
+
+
+@pytest.fixture
+def conversions():
+    return UnitConversions(1, UNITS, {MILK: 1.03})
+
+
+def test_group_by_dimension(conversions):
+    assert conversions.group(1, SALT) == 'mass'
+    assert conversions.group(4, SALT) == 'volume'
+    assert conversions.group(5, SALT) == 'count'
+
+
+def test_density_groups_by_foodstuff(conversions):
+    assert conversions.group(3, MILK) == ('mass', MILK)
+    assert conversions.group(1, MILK) == ('mass', MILK)
+
+
+def test_unknown_or_unconvertible_unit_groups_by_id(conversions):
+    assert conversions.group(6, SALT) == ('unit', 6)
+    assert conversions.group(99, SALT) == ('unit', 99)
+
+
+@pytest.mark.parametrize('amount, from_unit_id, to_unit_id, foodstuff_id, expected', [
+    (2, 2, 1, SALT, 2000),
+    (500, 1, 2, SALT, 0.5),
+    (1.5, 4, 3, SALT, 1500),
+    (7, 1, 1, SALT, 7),
+    (1, 4, 1, MILK, 1030),
+    (515, 1, 3, MILK, 500)
+])
+def test_convert(conversions, amount, from_unit_id, to_unit_id, foodstuff_id, expected):
+    assert conversions.convert(amount, from_unit_id, to_unit_id, foodstuff_id) == pytest.approx(expected)
+
+
+def test_add_need_merges_into_first_unit_of_group(conversions):
+    needs = []
+    groups = {}
+    add_need(needs, groups, conversions, SALT, 2, 'kg', 1)
+    add_need(needs, groups, conversions, SALT, 1, 'g', 250)
+    add_need(needs, groups, conversions, SALT, 5, 'pcs', 2)
+    add_need(needs, groups, conversions, SALT, 6, 'pinch', 1)
+    add_need(needs, groups, conversions, SALT, 6, 'pinch', 2)
+
+    assert needs == [
+        {'amount': 1.25, 'unit': 'kg'},
+        {'amount': 2, 'unit': 'pcs'},
+        {'amount': 3, 'unit': 'pinch'}
+    ]
+
+
+def test_add_need_merges_volume_into_mass_by_density(conversions):
+    needs = []
+    groups = {}
+    add_need(needs, groups, conversions, MILK, 1, 'g', 100)
+    add_need(needs, groups, conversions, MILK, 4, 'l', 0.5)
+
+    assert needs == [{'amount': pytest.approx(615), 'unit': 'g'}]
+
+
+def test_add_need_keeps_same_named_foodstuffs_without_density_apart(conversions):
+    needs = []
+    groups = {}
+    add_need(needs, groups, conversions, MILK, 3, 'ml', 200)
+    add_need(needs, groups, conversions, SALT, 1, 'g', 50)
+    add_need(needs, groups, conversions, MILK, 1, 'g', 103)
+    add_need(needs, groups, conversions, SALT, 2, 'kg', 1)
+
+    assert needs == [
+        {'amount': pytest.approx(300), 'unit': 'ml'},
+        {'amount': 1050, 'unit': 'g'}
+    ]